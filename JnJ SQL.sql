@@ -33,6 +33,18 @@ CREATE TABLE IF NOT EXISTS `dim_platform` (
   UNIQUE INDEX `uq_platform_name` (`platform_name` ASC) VISIBLE
 ) ENGINE = InnoDB;
 
+-- -----------------------------------------------------
+-- Table `jnj_solutions_db`.`dim_amenity`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `dim_amenity` (
+  `amenity_id` INT NOT NULL,
+  `amenity_name` VARCHAR(100) NOT NULL,
+  `amenity_group` VARCHAR(50) NOT NULL, -- Basic, Luxury General or Luxury Outdoor
+  `amenity_bit` TINYINT NOT NULL, -- Bit of dim_property.amenity_mask; amenity_id - 1
+  PRIMARY KEY (`amenity_id`),
+  UNIQUE INDEX `uq_amenity_name` (`amenity_name` ASC) VISIBLE
+) ENGINE = InnoDB;
+
 -- -----------------------------------------------------
 -- Table `jnj_solutions_db`.`dim_tenant`
 -- -----------------------------------------------------
@@ -56,6 +68,7 @@ CREATE TABLE IF NOT EXISTS `dim_property` (
   `city` VARCHAR(100) NOT NULL,
   `distance_to_city_center` DECIMAL(5,2) NULL,
   `amenities` TEXT NULL, -- Storing as comma-separated string
+  `amenity_mask` INT NOT NULL, -- Bit amenity_bit is set for each amenity in dim_amenity the property has
   `base_price` DECIMAL(10,2) NOT NULL,
   PRIMARY KEY (`property_id`),
   INDEX `fk_property_owner_idx` (`owner_id` ASC) VISIBLE,
@@ -66,6 +79,28 @@ CREATE TABLE IF NOT EXISTS `dim_property` (
     ON UPDATE NO ACTION
 ) ENGINE = InnoDB;
 
+-- -----------------------------------------------------
+-- Table `jnj_solutions_db`.`property_amenity`
+-- -----------------------------------------------------
+-- One row per property and amenity; the same sets as dim_property.amenity_mask, for indexed joins
+CREATE TABLE IF NOT EXISTS `property_amenity` (
+  `property_id` INT NOT NULL,
+  `amenity_id` INT NOT NULL,
+  PRIMARY KEY (`property_id`, `amenity_id`),
+  INDEX `fk_property_amenity_property_idx` (`property_id` ASC) VISIBLE,
+  INDEX `fk_property_amenity_amenity_idx` (`amenity_id` ASC) VISIBLE,
+  CONSTRAINT `fk_property_amenity_property`
+    FOREIGN KEY (`property_id`)
+    REFERENCES `dim_property` (`property_id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_property_amenity_amenity`
+    FOREIGN KEY (`amenity_id`)
+    REFERENCES `dim_amenity` (`amenity_id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION
+) ENGINE = InnoDB;
+
 -- -----------------------------------------------------
 -- Table `jnj_solutions_db`.`fact_bookings`
 -- -----------------------------------------------------
@@ -156,63 +191,76 @@ CREATE TABLE IF NOT EXISTS `fact_reviews` (
     ON UPDATE NO ACTION
 ) ENGINE = InnoDB;
 
--- Inserting Data
-
-LOAD DATA INFILE 'C:\\Users\\Eier\\Desktop\\Portfolio of a data analyst\\SQL Databases\\dim_date.csv'
-INTO TABLE dim_date
-FIELDS TERMINATED BY ','
-ENCLOSED BY '"'
-LINES TERMINATED BY '\n'
-IGNORE 1 ROWS;
-
-LOAD DATA INFILE 'C:\\Users\\Eier\\Desktop\\Portfolio of a data analyst\\SQL Databases\\dim_owner.csv'
-INTO TABLE dim_owner
-FIELDS TERMINATED BY ','
-ENCLOSED BY '"'
-LINES TERMINATED BY '\n'
-IGNORE 1 ROWS;
-
-LOAD DATA INFILE 'C:\\Users\\Eier\\Desktop\\Portfolio of a data analyst\\SQL Databases\\dim_platform.csv'
-INTO TABLE dim_platform
-FIELDS TERMINATED BY ','
-ENCLOSED BY '"'
-LINES TERMINATED BY '\n'
-IGNORE 1 ROWS;
-
-LOAD DATA INFILE 'C:\\Users\\Eier\\Desktop\\Portfolio of a data analyst\\SQL Databases\\dim_tenant.csv'
-INTO TABLE dim_tenant
-FIELDS TERMINATED BY ','
-ENCLOSED BY '"'
-LINES TERMINATED BY '\n'
-IGNORE 1 ROWS;
-
-LOAD DATA INFILE 'C:\\Users\\Eier\\Desktop\\Portfolio of a data analyst\\SQL Databases\\dim_property.csv'
-INTO TABLE dim_property
-FIELDS TERMINATED BY ','
-ENCLOSED BY '"'
-LINES TERMINATED BY '\n'
-IGNORE 1 ROWS;
-
-LOAD DATA INFILE 'C:\\Users\\Eier\\Desktop\\Portfolio of a data analyst\\SQL Databases\\fact_bookings.csv'
-INTO TABLE fact_bookings
-FIELDS TERMINATED BY ','
-ENCLOSED BY '"'
-LINES TERMINATED BY '\n'
-IGNORE 1 ROWS;
+-- -----------------------------------------------------
+-- Table `jnj_solutions_db`.`fact_property_daily`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `fact_property_daily` (
+  `property_id` INT NOT NULL,
+  `date_id` INT NOT NULL, -- Foreign key to dim_date
+  `date` DATE NOT NULL,
+  `occupied` TINYINT NOT NULL, -- 1 if any stay covers the night, 0 otherwise
+  `nightly_revenue` DECIMAL(12,2) NOT NULL,
+  `booking_id` INT NULL, -- The stay covering the night; NULL when vacant
+  PRIMARY KEY (`property_id`, `date_id`),
+  INDEX `fk_daily_property_idx` (`property_id` ASC) VISIBLE,
+  INDEX `fk_daily_date_idx` (`date_id` ASC) VISIBLE,
+  INDEX `fk_daily_booking_idx` (`booking_id` ASC) VISIBLE,
+  CONSTRAINT `fk_daily_property`
+    FOREIGN KEY (`property_id`)
+    REFERENCES `dim_property` (`property_id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_daily_date`
+    FOREIGN KEY (`date_id`)
+    REFERENCES `dim_date` (`date_id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_daily_booking`
+    FOREIGN KEY (`booking_id`)
+    REFERENCES `fact_bookings` (`booking_id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION
+) ENGINE = InnoDB;
 
-LOAD DATA INFILE 'C:\\Users\\Eier\\Desktop\\Portfolio of a data analyst\\SQL Databases\\fact_bookings.csv'
-INTO TABLE fact_bookings
-FIELDS TERMINATED BY ','
-ENCLOSED BY '"'
-LINES TERMINATED BY '\n'
-IGNORE 1 ROWS;
+-- -----------------------------------------------------
+-- Table `jnj_solutions_db`.`agg_rollup_cube`
+-- -----------------------------------------------------
+-- Built by jnj_cube.py from the fact tables. Holds only additive measures, so any slice is a
+-- sum of cells: ADR = revenue / nights_sold, occupancy = nights_sold / available_nights,
+-- average rating = rating_sum / rating_count.
+CREATE TABLE IF NOT EXISTS `agg_rollup_cube` (
+  `year` INT NOT NULL,
+  `country` VARCHAR(100) NOT NULL,
+  `property_type` VARCHAR(100) NOT NULL,
+  `property_id` INT NOT NULL,
+  `revenue` DECIMAL(14,2) NOT NULL, -- Bookings checking in during the year
+  `nights_sold` INT NOT NULL,
+  `available_nights` INT NOT NULL, -- Days of the year in dim_date
+  `bookings` INT NOT NULL,
+  `rating_sum` INT NOT NULL, -- Reviews written during the year
+  `rating_count` INT NOT NULL,
+  PRIMARY KEY (`year`, `property_id`),
+  INDEX `idx_cube_country_type` (`country` ASC, `property_type` ASC) VISIBLE,
+  CONSTRAINT `fk_cube_property`
+    FOREIGN KEY (`property_id`)
+    REFERENCES `dim_property` (`property_id`)
+    ON DELETE NO ACTION
+    ON UPDATE NO ACTION
+) ENGINE = InnoDB;
 
-LOAD DATA INFILE 'C:\\Users\\Eier\\Desktop\\Portfolio of a data analyst\\SQL Databases\\fact_reviews.csv'
-INTO TABLE fact_reviews
-FIELDS TERMINATED BY ','
-ENCLOSED BY '"'
-LINES TERMINATED BY '\n'
-IGNORE 1 ROWS;
+-- Inserting Data
+-- The generated tables are loaded by jnj_load.py, which sits next to jnj_script.py:
+--   python jnj_load.py --input-dir synthetic_booking_data_v2 --engine sqlite
+-- It loads dim_date, dim_owner, dim_platform, dim_amenity, dim_tenant, dim_property, property_amenity,
+-- fact_bookings, fact_reviews and fact_property_daily in that order, builds the keys and indexes above once the data is in,
+-- checks every foreign key and reports rows/sec per table.
+-- It then runs jnj_queries.py's refresh, which rebuilds two summary tables and adds covering indexes
+-- for the queries below:
+--   agg_property_year (property_id, year) and agg_year_country_type (year, country, property_type),
+--     with bookings, nights and revenue for bookings checking in that year
+--   idx_bookings_check_in_property on fact_bookings (check_in_date_id, property_id, nights, revenue),
+--     idx_date_year on dim_date (year, date_id), idx_property_type_country on dim_property
+-- python jnj_queries.py times each query against the bare tables and against the query layer.
 
 select count(property_id) as 'Total Counts', property_type, owner_name
 from
@@ -261,4 +309,31 @@ JOIN
 WHERE
     dp.property_type = 'Resort' AND dd.year = 2020 -- Add the year filter here
 GROUP BY
-    dp.property_type, dp.country;
\ No newline at end of file
+    dp.property_type, dp.country;
+-- properties with Swimming Pool and Hot Tub, by bitmask (bit 11 = 2048, bit 8 = 256; see dim_amenity.amenity_bit)
+select property_id, property_type, country, base_price
+from
+dim_property
+where amenity_mask & 2304 = 2304;
+
+-- the same properties through the bridge table
+select pa.property_id
+from
+property_amenity pa
+join dim_amenity a on a.amenity_id = pa.amenity_id
+where a.amenity_name in ('Swimming Pool', 'Hot Tub')
+group by pa.property_id
+having count(*) = 2;
+
+-- luxury premium: average base price by number of luxury amenities
+select luxury_amenities, count(*) as properties, avg(base_price) as avg_base_price
+from (
+    select p.property_id, p.base_price, count(a.amenity_id) as luxury_amenities
+    from
+    dim_property p
+    left join property_amenity pa on pa.property_id = p.property_id
+    left join dim_amenity a on a.amenity_id = pa.amenity_id and a.amenity_group <> 'Basic'
+    group by p.property_id, p.base_price
+) luxury
+group by luxury_amenities
+order by luxury_amenities;
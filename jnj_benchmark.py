@@ -0,0 +1,215 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+# --- Benchmark Configuration ---
+RESULTS_PATH = 'benchmark_results.json'
+BENCHMARK_SEED = 42 # Every profile runs from the same seed so runs are comparable
+PROPERTIES_PER_OWNER = 2.5 # Owners average ~2.9 properties under OWNER_CATEGORIES_CONFIG; this leaves headroom
+TENANTS_PER_PROPERTY = 5
+END_YEAR = 2023
+
+# Scale grid: every combination of property count and date span becomes one profile.
+# p600_y4 matches the script's own configuration.
+SCALE_GRID = {
+    'num_properties': [600, 5_000, 20_000, 100_000],
+    'years': [4, 10],
+}
+DEFAULT_PROFILES = ['p600_y4', 'p600_y10', 'p5000_y4', 'p5000_y10'] # Run when --profiles is not given
+
+# --- Budgets ---
+# A run fails when a profile exceeds its wall time or peak memory, when a stage grows faster
+# than MAX_COMPLEXITY_EXPONENT, or when a profile is REGRESSION_TOLERANCE times slower than
+# in the --baseline results.
+PROFILE_BUDGETS = {
+    'p600_y4': {'wall_seconds': 60, 'peak_rss_mb': 1_024},
+    'p600_y10': {'wall_seconds': 120, 'peak_rss_mb': 2_048},
+    'p5000_y4': {'wall_seconds': 300, 'peak_rss_mb': 4_096},
+    'p5000_y10': {'wall_seconds': 600, 'peak_rss_mb': 8_192},
+}
+MAX_COMPLEXITY_EXPONENT = 1.3 # Stage time ~ rows ** exponent; 1.0 is linear
+MIN_FIT_SECONDS = 0.05 # Shorter stage timings are mostly noise and are left out of the fits
+MIN_FIT_RUNS = 3 # Exponents fitted on fewer runs are reported but not held to the budget
+REGRESSION_TOLERANCE = 1.25
+
+
+def build_scale_profiles():
+    """One profile per SCALE_GRID combination, named p<properties>_y<years>."""
+    profiles = {}
+    for num_properties in SCALE_GRID['num_properties']:
+        for years in SCALE_GRID['years']:
+            profiles[f'p{num_properties}_y{years}'] = {
+                'num_properties': num_properties,
+                'num_owners': 150 if num_properties == 600 else math.ceil(num_properties / PROPERTIES_PER_OWNER),
+                'num_tenants': max(1_000, num_properties * TENANTS_PER_PROPERTY),
+                'start_date': str(date(END_YEAR - years + 1, 1, 1)),
+                'end_date': str(date(END_YEAR, 12, 31)),
+            }
+    return profiles
+
+SCALE_PROFILES = build_scale_profiles()
+
+
+def apply_scale_profile(generator, profile):
+    """Point jnj_script's configuration at a scale profile; owner categories keep their shares."""
+    owner_scale = profile['num_owners'] / generator.NUM_OWNERS
+    categories = {name: dict(config, count=int(config['count'] * owner_scale))
+                  for name, config in generator.OWNER_CATEGORIES_CONFIG.items()}
+    categories['Sole Proprietor']['count'] += profile['num_owners'] - sum(config['count'] for config in categories.values())
+    generator.OWNER_CATEGORIES_CONFIG = categories
+    generator.NUM_OWNERS = profile['num_owners']
+    generator.NUM_PROPERTIES = profile['num_properties']
+    generator.NUM_TENANTS = profile['num_tenants']
+    generator.START_DATE = date.fromisoformat(profile['start_date'])
+    generator.END_DATE = date.fromisoformat(profile['end_date'])
+
+
+def run_scale_profile(profile, output_dir, report_path, workers=1, output_format='csv'):
+    """Generate one profile into output_dir and write its stage report. Runs in a fresh interpreter."""
+    import jnj_script as generator
+    from jnj_profile import StageProfiler
+
+    apply_scale_profile(generator, profile)
+    generator.OUTPUT_DIR = output_dir
+    os.makedirs(output_dir, exist_ok=True)
+    profiler = StageProfiler()
+    generator.generate_dataset(BENCHMARK_SEED, workers, output_format, profiler=profiler)
+    profiler.write_report(report_path, workers=workers, format=output_format, **profile)
+
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def benchmark_profile(name, workers, output_format, keep_output=False):
+    """Run a profile in a subprocess, so its peak memory is its own, and collect the measurements."""
+    profile = SCALE_PROFILES[name]
+    work_dir = tempfile.mkdtemp(prefix=f'jnj_bench_{name}_')
+    report_path = os.path.join(work_dir, 'report.json')
+    output_dir = os.path.join(work_dir, 'output')
+    arguments = json.dumps({'profile': profile, 'output_dir': output_dir, 'report_path': report_path,
+                            'workers': workers, 'output_format': output_format})
+    started = time.perf_counter()
+    try:
+        subprocess.run(
+            [sys.executable, '-c', 'import json, sys, jnj_benchmark; jnj_benchmark.run_scale_profile(**json.loads(sys.argv[1]))', arguments],
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True, stdout=subprocess.DEVNULL,
+        )
+        wall_seconds = time.perf_counter() - started
+        with open(report_path) as report_file:
+            report = json.load(report_file)
+        output_bytes = directory_bytes(output_dir)
+    finally:
+        if not keep_output:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    # Shard stages report their worker's peak, which the parent's own peak does not include
+    peaks = [report['peak_rss_mb']] + [stage['peak_rss_mb'] for stage in report['stages']]
+    return {
+        'profile': name,
+        **profile,
+        'property_days': profile['num_properties'] * ((date.fromisoformat(profile['end_date']) - date.fromisoformat(profile['start_date'])).days + 1),
+        'wall_seconds': round(wall_seconds, 3),
+        'peak_rss_mb': max((peak for peak in peaks if peak is not None), default=None),
+        'output_mb': round(output_bytes / 2**20, 1),
+        'stages': report['stages'],
+    }
+
+
+def fit_complexity(results):
+    """Fit time ~ size ** exponent per stage by least squares on log-log values.
+
+    The size is the stage's own row count, and property-days for the whole run.
+    A stage needs at least two runs with different sizes that took MIN_FIT_SECONDS or more.
+    """
+    samples = {'total': [(result['property_days'], result['wall_seconds']) for result in results]}
+    for result in results:
+        for stage in result['stages']:
+            if stage['rows'] and stage['wall_seconds'] >= MIN_FIT_SECONDS:
+                samples.setdefault(stage['stage'], []).append((stage['rows'], stage['wall_seconds']))
+
+    fits = {}
+    for stage_name, points in samples.items():
+        sizes, seconds = np.array(points, dtype=float).T
+        if len(np.unique(sizes)) < 2:
+            continue
+        exponent, intercept = np.polyfit(np.log(sizes), np.log(seconds), 1)
+        fits[stage_name] = {'exponent': round(float(exponent), 3), 'runs': len(points),
+                            'seconds_per_million': round(float(np.exp(intercept) * 1e6 ** exponent), 3)}
+    return fits
+
+
+def check_budgets(results, fits, baseline=None):
+    """Every budget the run broke, as readable messages."""
+    failures = []
+    for result in results:
+        budget = PROFILE_BUDGETS.get(result['profile'], {})
+        if 'wall_seconds' in budget and result['wall_seconds'] > budget['wall_seconds']:
+            failures.append(f"{result['profile']}: {result['wall_seconds']:.1f} s exceeds the {budget['wall_seconds']} s budget")
+        if 'peak_rss_mb' in budget and (result['peak_rss_mb'] or 0) > budget['peak_rss_mb']:
+            failures.append(f"{result['profile']}: {result['peak_rss_mb']:.0f} MB peak exceeds the {budget['peak_rss_mb']} MB budget")
+    for stage_name, fit in fits.items():
+        if fit['runs'] >= MIN_FIT_RUNS and fit['exponent'] > MAX_COMPLEXITY_EXPONENT:
+            failures.append(f"{stage_name}: grows as size ** {fit['exponent']}, above {MAX_COMPLEXITY_EXPONENT}")
+    if baseline:
+        previous = {result['profile']: result for result in baseline['results']}
+        for result in results:
+            before = previous.get(result['profile'])
+            if before and result['wall_seconds'] > before['wall_seconds'] * REGRESSION_TOLERANCE:
+                failures.append(f"{result['profile']}: {result['wall_seconds']:.1f} s vs {before['wall_seconds']:.1f} s in the baseline")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jnj_script.py across a grid of scale profiles.")
+    parser.add_argument('--profiles', default=','.join(DEFAULT_PROFILES),
+                        help=f"Comma-separated profiles to run, or 'all' ({', '.join(SCALE_PROFILES)})")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes per generation run")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Output format to generate")
+    parser.add_argument('--output', default=RESULTS_PATH, help="Where to write the results JSON")
+    parser.add_argument('--baseline', help="Earlier results JSON; fail if a profile got REGRESSION_TOLERANCE times slower")
+    parser.add_argument('--keep-output', action='store_true', help="Keep each profile's generated tables")
+    args = parser.parse_args()
+
+    names = list(SCALE_PROFILES) if args.profiles == 'all' else args.profiles.split(',')
+    unknown = [name for name in names if name not in SCALE_PROFILES]
+    if unknown:
+        parser.error(f"Unknown profile(s): {', '.join(unknown)}")
+
+    results = []
+    for name in names:
+        print(f"Running {name}...")
+        result = benchmark_profile(name, args.workers, args.format, args.keep_output)
+        print(f"{name:<12} {result['wall_seconds']:>9.2f} s {result['peak_rss_mb'] or 0:>9.0f} MB peak {result['output_mb']:>9.1f} MB output")
+        results.append(result)
+
+    fits = fit_complexity(results)
+    for stage_name, fit in fits.items():
+        print(f"{stage_name:<26} time ~ size ** {fit['exponent']:.2f} over {fit['runs']} runs")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    failures = check_budgets(results, fits, baseline)
+    with open(args.output, 'w') as results_file:
+        json.dump({'seed': BENCHMARK_SEED, 'workers': args.workers, 'format': args.format,
+                   'results': results, 'complexity': fits, 'failures': failures}, results_file, indent=2)
+    print(f"Results written to '{args.output}'.")
+
+    if failures:
+        print("Budget failures:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
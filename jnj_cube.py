@@ -0,0 +1,143 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from jnj_output import OUTPUT_FORMATS, iter_table_chunks, read_table, write_table
+
+# --- Cube Configuration ---
+INPUT_DIR = 'synthetic_booking_data_v2'
+CUBE_TABLE = 'agg_rollup_cube'
+CHUNK_ROWS = 500_000 # Fact rows read per chunk while the cube is accumulated
+
+# One cell per property and year. country and property_type come with the property, so
+# the cell grain is year x country x property_type x property_id and every coarser slice
+# is a sum of cells. Only additive components are stored; ratios are computed after summing.
+CUBE_DIMENSIONS = ['year', 'country', 'property_type', 'property_id']
+CUBE_MEASURES = ['revenue', 'nights_sold', 'available_nights', 'bookings', 'rating_sum', 'rating_count']
+
+
+def build_rollup_cube(dim_property, dim_date, booking_chunks, review_chunks):
+    """Accumulate the cube from dimension tables and iterables of fact chunks.
+
+    Bookings count towards the year they check in, reviews towards the year they were
+    written, and every property has dim_date's days of each year available. Chunks are
+    folded in one at a time, so the fact tables never need to be in memory at once.
+    """
+    property_ids = dim_property['property_id'].to_numpy()
+    property_index = pd.Index(property_ids)
+    date_ids = dim_date['date_id'].to_numpy()
+    years, year_of_date = np.unique(dim_date['year'].to_numpy(), return_inverse=True)
+    year_by_date_id = np.full(date_ids.max() + 1, -1, dtype=np.int64)
+    year_by_date_id[date_ids] = year_of_date
+    num_cells = len(property_ids) * len(years)
+
+    def cell(property_column, date_id_column):
+        return property_index.get_indexer(property_column) * len(years) + year_by_date_id[date_id_column.to_numpy()]
+
+    totals = {measure: np.zeros(num_cells) for measure in CUBE_MEASURES}
+    for chunk in booking_chunks:
+        cells = cell(chunk['property_id'], chunk['check_in_date_id'])
+        totals['revenue'] += np.bincount(cells, weights=chunk['revenue'].to_numpy(), minlength=num_cells)
+        totals['nights_sold'] += np.bincount(cells, weights=chunk['nights'].to_numpy(), minlength=num_cells)
+        totals['bookings'] += np.bincount(cells, minlength=num_cells)
+    for chunk in review_chunks:
+        cells = cell(chunk['property_id'], chunk['review_date_id'])
+        totals['rating_sum'] += np.bincount(cells, weights=chunk['rating'].to_numpy(), minlength=num_cells)
+        totals['rating_count'] += np.bincount(cells, minlength=num_cells)
+    totals['available_nights'] = np.tile(np.bincount(year_of_date, minlength=len(years)), len(property_ids))
+
+    cube = pd.DataFrame({
+        'year': np.tile(years, len(property_ids)).astype(np.int16),
+        'country': np.repeat(dim_property['country'].to_numpy(), len(years)),
+        'property_type': np.repeat(dim_property['property_type'].to_numpy(), len(years)),
+        'property_id': np.repeat(property_ids, len(years)).astype(np.int32),
+    })
+    for measure in CUBE_MEASURES:
+        cube[measure] = np.round(totals[measure], 2) if measure == 'revenue' else totals[measure].astype(np.int32)
+    return cube
+
+def read_rollup_inputs(input_dir=INPUT_DIR, input_format='csv', chunk_rows=CHUNK_ROWS):
+    """The cube's inputs from a generated dataset: both dimensions whole, the facts as chunk iterators."""
+    return (
+        read_table(input_dir, 'dim_property', input_format, columns=['property_id', 'country', 'property_type']),
+        read_table(input_dir, 'dim_date', input_format, columns=['date_id', 'year']),
+        iter_table_chunks(input_dir, 'fact_bookings', input_format, chunk_rows,
+                          columns=['property_id', 'check_in_date_id', 'nights', 'revenue']),
+        iter_table_chunks(input_dir, 'fact_reviews', input_format, chunk_rows,
+                          columns=['property_id', 'review_date_id', 'rating']),
+    )
+
+
+# --- Queries ---
+def slice_cells(cube, **filters):
+    """Cells matching every filter; a filter is one value or a list of values, None means all."""
+    mask = np.ones(len(cube), dtype=bool)
+    for dimension, value in filters.items():
+        if dimension not in CUBE_DIMENSIONS:
+            raise KeyError(f"Unknown cube dimension '{dimension}'; expected one of {', '.join(CUBE_DIMENSIONS)}")
+        if value is None:
+            continue
+        values = cube[dimension].to_numpy()
+        mask &= np.isin(values, value) if isinstance(value, (list, tuple, set)) else values == value
+    return cube[mask]
+
+def slice_metrics(cube, **filters):
+    """The executive-summary metrics for a slice, from the sums of its cells."""
+    totals = slice_cells(cube, **filters)[CUBE_MEASURES].sum()
+    ratio = lambda numerator, denominator: float(totals[numerator] / totals[denominator]) if totals[denominator] else None
+    return {
+        'total_revenue': round(float(totals['revenue']), 2),
+        'adr': ratio('revenue', 'nights_sold'),
+        'occupancy_rate': ratio('nights_sold', 'available_nights'),
+        'average_rating': ratio('rating_sum', 'rating_count'),
+        'bookings': int(totals['bookings']),
+    }
+
+def compare_to_portfolio(cube, year=None, **filters):
+    """Metrics for a selection next to the whole portfolio's over the same years, as the dashboard compares them."""
+    return {
+        'selection': slice_metrics(cube, year=year, **filters),
+        'portfolio': slice_metrics(cube, year=year),
+    }
+
+
+def format_metric(metric, value):
+    if value is None:
+        return 'n/a'
+    if metric == 'occupancy_rate':
+        return f'{value:.1%}'
+    return f'{value:,}' if isinstance(value, int) else f'{value:,.2f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the year x country x property_type x property_id rollup cube.")
+    parser.add_argument('--input-dir', default=INPUT_DIR, help="Folder written by jnj_script.py")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv', help="Format the tables were generated in")
+    parser.add_argument('--output-dir', help=f"Where to write {CUBE_TABLE}; defaults to the input folder")
+    parser.add_argument('--year', type=int, help="Print this selection's metrics against the portfolio")
+    parser.add_argument('--country')
+    parser.add_argument('--property-type')
+    parser.add_argument('--property-id', type=int)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    cube = build_rollup_cube(*read_rollup_inputs(args.input_dir, args.format))
+    output_dir = args.output_dir or args.input_dir
+    os.makedirs(output_dir, exist_ok=True)
+    path = write_table(cube, output_dir, CUBE_TABLE, args.format)
+    print(f"{CUBE_TABLE} built with {len(cube)} cells in {time.perf_counter() - started:.2f} s and written to '{path}'.")
+
+    started = time.perf_counter()
+    comparison = compare_to_portfolio(cube, year=args.year, country=args.country,
+                                      property_type=args.property_type, property_id=args.property_id)
+    print(f"Slice answered in {(time.perf_counter() - started) * 1000:.1f} ms:")
+    for metric in comparison['selection']:
+        selection, portfolio = (format_metric(metric, comparison[side][metric]) for side in ('selection', 'portfolio'))
+        print(f"  {metric:<15} {selection:>15} vs portfolio {portfolio:>15}")
+
+
+if __name__ == '__main__':
+    main()
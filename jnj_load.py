@@ -0,0 +1,213 @@
+import argparse
+import os
+import sqlite3
+import time
+
+from jnj_output import OUTPUT_FORMATS, TABLE_SCHEMAS, iter_table_chunks, table_files, table_path
+from jnj_queries import drop_query_layer, refresh_query_layer
+
+try:
+    import duckdb
+except ImportError: # DuckDB is an optional stand-in; SQLite ships with Python
+    duckdb = None
+
+# --- Load Configuration ---
+INPUT_DIR = 'synthetic_booking_data_v2'
+DATABASE_PATH = 'jnj_solutions_db.sqlite'
+ENGINES = ['sqlite', 'duckdb']
+BATCH_ROWS = 50_000 # Rows per executemany() batch for SQLite
+
+# Dimensions load before the facts that reference them
+LOAD_ORDER = ['dim_date', 'dim_owner', 'dim_platform', 'dim_amenity', 'dim_tenant', 'dim_property', 'property_amenity',
+              'fact_bookings', 'fact_reviews', 'fact_property_daily']
+OPTIONAL_TABLES = {'fact_property_daily'} # Skipped when the generator was run without them
+
+# --- Constraints from JnJ SQL.sql ---
+# Created after the data is in, so the bulk load never maintains an index row by row.
+PRIMARY_KEYS = {
+    'dim_date': 'date_id',
+    'dim_owner': 'owner_id',
+    'dim_platform': 'platform_id',
+    'dim_amenity': 'amenity_id',
+    'dim_tenant': 'tenant_id',
+    'dim_property': 'property_id',
+    'property_amenity': 'property_id, amenity_id',
+    'fact_bookings': 'booking_id',
+    'fact_reviews': 'review_id',
+    'fact_property_daily': 'property_id, date_id',
+}
+
+UNIQUE_INDEXES = [
+    # (table, index name, column)
+    ('dim_date', 'uq_date', 'date'),
+    ('dim_owner', 'uq_owner_email', 'owner_email'),
+    ('dim_platform', 'uq_platform_name', 'platform_name'),
+    ('dim_amenity', 'uq_amenity_name', 'amenity_name'),
+    ('dim_tenant', 'uq_tenant_email', 'tenant_email'),
+]
+
+FOREIGN_KEYS = [
+    # (constraint name, table, column, referenced table, referenced column); each gets a <name>_idx index
+    ('fk_property_owner', 'dim_property', 'owner_id', 'dim_owner', 'owner_id'),
+    ('fk_property_amenity_property', 'property_amenity', 'property_id', 'dim_property', 'property_id'),
+    ('fk_property_amenity_amenity', 'property_amenity', 'amenity_id', 'dim_amenity', 'amenity_id'),
+    ('fk_bookings_property', 'fact_bookings', 'property_id', 'dim_property', 'property_id'),
+    ('fk_bookings_platform', 'fact_bookings', 'platform_id', 'dim_platform', 'platform_id'),
+    ('fk_bookings_tenant', 'fact_bookings', 'tenant_id', 'dim_tenant', 'tenant_id'),
+    ('fk_bookings_check_in_date', 'fact_bookings', 'check_in_date_id', 'dim_date', 'date_id'),
+    ('fk_bookings_check_out_date', 'fact_bookings', 'check_out_date_id', 'dim_date', 'date_id'),
+    ('fk_reviews_booking', 'fact_reviews', 'booking_id', 'fact_bookings', 'booking_id'),
+    ('fk_reviews_tenant', 'fact_reviews', 'tenant_id', 'dim_tenant', 'tenant_id'),
+    ('fk_reviews_property', 'fact_reviews', 'property_id', 'dim_property', 'property_id'),
+    ('fk_reviews_review_date', 'fact_reviews', 'review_date_id', 'dim_date', 'date_id'),
+    ('fk_daily_property', 'fact_property_daily', 'property_id', 'dim_property', 'property_id'),
+    ('fk_daily_date', 'fact_property_daily', 'date_id', 'dim_date', 'date_id'),
+    ('fk_daily_booking', 'fact_property_daily', 'booking_id', 'fact_bookings', 'booking_id'),
+]
+
+SQL_TYPES = {
+    'int8': 'TINYINT', 'int16': 'SMALLINT', 'int32': 'INTEGER', 'float64': 'DOUBLE',
+    'date': 'DATE', 'string': 'VARCHAR', 'category': 'VARCHAR',
+}
+
+
+def connect(engine, database_path):
+    if engine == 'duckdb':
+        if duckdb is None:
+            raise ImportError("The DuckDB engine needs duckdb: pip install duckdb")
+        return duckdb.connect(database_path)
+    connection = sqlite3.connect(database_path)
+    # Bulk-load settings: the file is rebuilt from the generated tables, so durability is not needed mid-load
+    connection.execute('PRAGMA journal_mode = OFF')
+    connection.execute('PRAGMA synchronous = OFF')
+    return connection
+
+
+def create_tables(connection):
+    """Drop and recreate every table with columns only; keys and indexes come after the load."""
+    drop_query_layer(connection) # Summary tables are rebuilt from the new data once it is in
+    for table_name in reversed(LOAD_ORDER):
+        connection.execute(f'DROP TABLE IF EXISTS {table_name}')
+    for table_name in LOAD_ORDER:
+        columns = ', '.join(f'{column} {SQL_TYPES[kind]}' for column, kind in TABLE_SCHEMAS[table_name].items())
+        connection.execute(f'CREATE TABLE {table_name} ({columns})')
+
+
+def load_table_sqlite(connection, input_dir, table_name, input_format, batch_rows):
+    """Stream a table into SQLite with one executemany() per chunk inside a single transaction."""
+    placeholders = ', '.join('?' for _ in TABLE_SCHEMAS[table_name])
+    insert_sql = f'INSERT INTO {table_name} VALUES ({placeholders})'
+    rows_loaded = 0
+    with connection:
+        for chunk in iter_table_chunks(input_dir, table_name, input_format, chunk_rows=batch_rows):
+            # Series.tolist() hands sqlite3 plain Python scalars rather than NumPy ones
+            connection.executemany(insert_sql, zip(*(chunk[column].tolist() for column in chunk.columns)))
+            rows_loaded += len(chunk)
+    return rows_loaded
+
+
+def load_table_duckdb(connection, input_dir, table_name, input_format):
+    """Bulk-copy a table with DuckDB's native CSV/Parquet scanners."""
+    schema = TABLE_SCHEMAS[table_name]
+    column_list = ', '.join(schema)
+    files = table_files(input_dir, table_name, input_format)
+    if input_format == 'parquet':
+        source = f"read_parquet({files!r}, hive_partitioning = false)"
+    else:
+        column_types = ', '.join(f"'{column}': '{SQL_TYPES[kind]}'" for column, kind in schema.items())
+        source = f"read_csv({files!r}, header = true, columns = {{{column_types}}})"
+    connection.execute(f'INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {source}')
+    return connection.execute(f'SELECT COUNT(*) FROM {table_name}').fetchone()[0]
+
+
+def create_indexes(connection):
+    """Primary keys, unique indexes and foreign-key indexes from JnJ SQL.sql, built once after the load."""
+    for table_name, column in PRIMARY_KEYS.items():
+        connection.execute(f'CREATE UNIQUE INDEX pk_{table_name} ON {table_name} ({column})')
+    for table_name, index_name, column in UNIQUE_INDEXES:
+        connection.execute(f'CREATE UNIQUE INDEX {index_name} ON {table_name} ({column})')
+    for constraint_name, table_name, column, _, _ in FOREIGN_KEYS:
+        connection.execute(f'CREATE INDEX {constraint_name}_idx ON {table_name} ({column})')
+
+
+def check_foreign_keys(connection):
+    """Count rows whose foreign key has no parent row.
+
+    Neither SQLite nor DuckDB can add a FOREIGN KEY to a populated table, so the
+    constraints are enforced here with one anti-join each instead.
+    """
+    violations = {}
+    for constraint_name, table_name, column, parent_table, parent_column in FOREIGN_KEYS:
+        violations[constraint_name] = connection.execute(
+            f'SELECT COUNT(*) FROM {table_name} t '
+            f'WHERE t.{column} IS NOT NULL AND NOT EXISTS '
+            f'(SELECT 1 FROM {parent_table} p WHERE p.{parent_column} = t.{column})'
+        ).fetchone()[0]
+    return violations
+
+
+def load_warehouse(input_dir=INPUT_DIR, database_path=DATABASE_PATH, engine='sqlite', input_format='csv', batch_rows=BATCH_ROWS):
+    """Load every generated table into a fresh database and return per-step timings."""
+    for table_name in LOAD_ORDER:
+        if table_name not in OPTIONAL_TABLES and not os.path.exists(table_path(input_dir, table_name, input_format)):
+            raise FileNotFoundError(f"{table_name} not found in '{input_dir}'; run jnj_script.py --format {input_format} first")
+
+    connection = connect(engine, database_path)
+    report = {'engine': engine, 'database': database_path, 'tables': []}
+    try:
+        create_tables(connection)
+        for table_name in LOAD_ORDER:
+            if not os.path.exists(table_path(input_dir, table_name, input_format)):
+                print(f"{table_name:<19} not generated, left empty")
+                continue
+            started = time.perf_counter()
+            if engine == 'duckdb':
+                rows_loaded = load_table_duckdb(connection, input_dir, table_name, input_format)
+            else:
+                rows_loaded = load_table_sqlite(connection, input_dir, table_name, input_format, batch_rows)
+            seconds = time.perf_counter() - started
+            report['tables'].append({
+                'table': table_name,
+                'rows': rows_loaded,
+                'seconds': round(seconds, 3),
+                'rows_per_sec': round(rows_loaded / seconds) if seconds > 0 else None,
+            })
+            print(f"{table_name:<19} {rows_loaded:>12,} rows {seconds:>9.2f} s {rows_loaded / max(seconds, 1e-9):>14,.0f} rows/s")
+
+        started = time.perf_counter()
+        create_indexes(connection)
+        report['index_seconds'] = round(time.perf_counter() - started, 3)
+        print(f"Indexes created in {report['index_seconds']:.2f} s")
+
+        started = time.perf_counter()
+        report['foreign_key_violations'] = check_foreign_keys(connection)
+        report['foreign_key_check_seconds'] = round(time.perf_counter() - started, 3)
+        bad_keys = {name: count for name, count in report['foreign_key_violations'].items() if count}
+        print(f"Foreign keys checked in {report['foreign_key_check_seconds']:.2f} s: "
+              f"{'all valid' if not bad_keys else bad_keys}")
+
+        started = time.perf_counter()
+        report['summary_rows'] = refresh_query_layer(connection)
+        report['query_layer_seconds'] = round(time.perf_counter() - started, 3)
+        print(f"Summary tables and covering indexes refreshed in {report['query_layer_seconds']:.2f} s")
+        connection.commit()
+    finally:
+        connection.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load the generated JnJ warehouse into SQLite or DuckDB.")
+    parser.add_argument('--input-dir', default=INPUT_DIR, help="Folder written by jnj_script.py")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv', help="Format the tables were generated in")
+    parser.add_argument('--engine', choices=ENGINES, default='sqlite', help="Database used as the backing store")
+    parser.add_argument('--database', default=DATABASE_PATH, help="Database file to (re)create")
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS, help="Rows per insert batch (SQLite)")
+    args = parser.parse_args()
+
+    print(f"Loading '{args.input_dir}' ({args.format}) into {args.engine} database '{args.database}'...")
+    load_warehouse(args.input_dir, args.database, args.engine, args.format, args.batch_rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # Parquet output is optional; CSV needs only pandas
+    pa = None
+    pq = None
+
+OUTPUT_FORMATS = ['csv', 'parquet']
+COPY_BUFFER_BYTES = 16 * 2**20 # Read size when part files are merged into a table
+
+# --- Table Schemas ---
+# Column types for every generated table, kept in step with the DDL in JnJ SQL.sql.
+# 'category' columns are dictionary-encoded in Parquet; ids are int32 and flags int8.
+TABLE_SCHEMAS = {
+    'dim_date': {
+        'date_id': 'int32', 'date': 'date', 'year': 'int16', 'quarter': 'int8',
+        'month': 'int8', 'day': 'int8', 'weekday': 'int8'
+    },
+    'dim_owner': {
+        'owner_id': 'int32', 'owner_name': 'string', 'owner_email': 'string',
+        'owner_phone': 'string', 'owner_category': 'category'
+    },
+    'dim_platform': {
+        'platform_id': 'int32', 'platform_name': 'string'
+    },
+    'dim_tenant': {
+        'tenant_id': 'int32', 'tenant_name': 'string', 'tenant_email': 'string', 'tenant_phone': 'string'
+    },
+    'dim_property': {
+        'property_id': 'int32', 'owner_id': 'int32', 'property_type': 'category', 'country': 'category',
+        'city': 'category', 'distance_to_city_center': 'float64', 'amenities': 'category', 'amenity_mask': 'int32',
+        'base_price': 'float64'
+    },
+    'dim_amenity': {
+        'amenity_id': 'int32', 'amenity_name': 'string', 'amenity_group': 'category', 'amenity_bit': 'int8'
+    },
+    'property_amenity': {
+        'property_id': 'int32', 'amenity_id': 'int32'
+    },
+    'fact_bookings': {
+        'booking_id': 'int32', 'property_id': 'int32', 'platform_id': 'int32', 'tenant_id': 'int32',
+        'check_in_date_id': 'int32', 'check_out_date_id': 'int32', 'check_in': 'date', 'check_out': 'date',
+        'nights': 'int16', 'revenue': 'float64', 'purpose_of_stay': 'category',
+        'damage_flag': 'int8', 'damage_cost': 'float64', 'turnover_flag': 'int8'
+    },
+    'fact_reviews': {
+        'review_id': 'int32', 'booking_id': 'int32', 'tenant_id': 'int32', 'property_id': 'int32',
+        'review_date_id': 'int32', 'rating': 'int8', 'review_text': 'category', 'review_date': 'date'
+    },
+    'fact_property_daily': {
+        'property_id': 'int32', 'date_id': 'int32', 'date': 'date', 'occupied': 'int8',
+        'nightly_revenue': 'float64', 'booking_id': 'int32'
+    },
+    'agg_rollup_cube': {
+        'year': 'int16', 'country': 'category', 'property_type': 'category', 'property_id': 'int32',
+        'revenue': 'float64', 'nights_sold': 'int32', 'available_nights': 'int32', 'bookings': 'int32',
+        'rating_sum': 'int32', 'rating_count': 'int32'
+    },
+}
+
+# Fact tables are partitioned by the year of this date column in Parquet output
+PARTITION_DATE_COLUMNS = {
+    'fact_bookings': 'check_in',
+    'fact_reviews': 'review_date',
+    'fact_property_daily': 'date',
+}
+
+
+def table_path(output_dir, table_name, output_format):
+    """Where a table lives: a .csv file, a .parquet file, or a year-partitioned Parquet directory."""
+    if output_format == 'parquet' and table_name in PARTITION_DATE_COLUMNS:
+        return os.path.join(output_dir, table_name)
+    return os.path.join(output_dir, f'{table_name}.{output_format}')
+
+
+def to_arrow_table(df, table_name):
+    """Convert a generated DataFrame to an Arrow table using the compact TABLE_SCHEMAS types."""
+    if pa is None:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+    arrays = {}
+    for column, kind in TABLE_SCHEMAS[table_name].items():
+        if column not in df.columns:
+            continue # Partition columns are carried by the directory name
+        values = df[column]
+        if kind == 'date':
+            arrays[column] = pa.array(pd.to_datetime(values).to_numpy().astype('datetime64[D]'), type=pa.date32())
+        elif kind == 'category':
+            arrays[column] = pa.array(values.astype(object).to_numpy(), type=pa.string()).dictionary_encode()
+        elif kind == 'string':
+            arrays[column] = pa.array(values.astype(object).to_numpy(), type=pa.string())
+        else:
+            # Nullable pandas dtype, so empty values (e.g. booking_id on vacant nights) stay null
+            arrays[column] = pa.array(values.astype(kind.replace('int', 'Int')))
+    return pa.table(arrays)
+
+
+def write_table(df, output_dir, table_name, output_format='csv'):
+    """Write a whole (dimension) table in the selected output format."""
+    path = table_path(output_dir, table_name, output_format)
+    if output_format == 'parquet':
+        pq.write_table(to_arrow_table(df, table_name), path)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+class CsvTableWriter:
+    """Writes a fact table to CSV either chunk by chunk or in a single to_csv call.
+
+    In streaming mode each chunk is appended as soon as it is written and the writer
+    keeps no rows; the caller still holds whatever it passes in. Otherwise chunks are
+    collected and written on close(). Both modes produce byte-identical files for the
+    same chunks. With append=True the rows are added to the end of an existing file and
+    no header is written. merge_part() appends a table another writer wrote elsewhere.
+    """
+
+    def __init__(self, path, table_name, columns, stream=True, append=False):
+        self.path = path
+        self.table_name = table_name
+        self.columns = columns
+        self.stream = stream
+        self.append = append
+        self.rows_written = 0
+        self._pending_chunks = []
+        self._header_written = append
+
+    def write(self, chunk):
+        if self.stream:
+            chunk.to_csv(self.path, mode='a' if self._header_written else 'w', header=not self._header_written, index=False)
+            self._header_written = True
+        else:
+            self._pending_chunks.append(chunk)
+        self.rows_written += len(chunk)
+
+    def merge_part(self, part_dir, rows):
+        """Append the rows of the same table written under part_dir, copying its bytes after the header."""
+        self._write_pending() # Rows written before the part come first
+        with open(table_path(part_dir, self.table_name, 'csv'), 'rb') as part, \
+                open(self.path, 'ab' if self._header_written else 'wb') as output:
+            header = part.readline()
+            if not self._header_written:
+                output.write(header)
+            shutil.copyfileobj(part, output, COPY_BUFFER_BYTES)
+        self._header_written = True
+        self.rows_written += rows
+
+    def _write_pending(self):
+        # Rows already on disk (appended to, or merged in by merge_part) are kept
+        if self._pending_chunks:
+            table = pd.concat(self._pending_chunks, ignore_index=True)
+            table.to_csv(self.path, mode='a' if self._header_written else 'w', header=not self._header_written, index=False)
+            self._header_written = True
+            self._pending_chunks = []
+
+    def close(self):
+        if not self.stream:
+            self._write_pending()
+        if not self._header_written:
+            pd.DataFrame(columns=self.columns).to_csv(self.path, index=False)
+            self._header_written = True
+
+
+class ParquetTableWriter:
+    """Writes a fact table as Parquet files partitioned by year (<table>/year=YYYY/part-NNNNN.parquet).
+
+    In streaming mode every chunk becomes one part file per year it touches; otherwise
+    the chunks are collected and each year is written as a single part on close().
+    With append=True the existing parts are kept and numbering continues after them.
+    """
+
+    def __init__(self, path, table_name, columns, stream=True, append=False):
+        if pa is None:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+        self.path = path
+        self.table_name = table_name
+        self.columns = columns
+        self.stream = stream
+        self.rows_written = 0
+        self._pending_chunks = []
+        if append:
+            existing_parts = [int(os.path.basename(part)[len('part-'):-len('.parquet')])
+                              for part in table_files(os.path.dirname(path), table_name, 'parquet')]
+            self._next_part = max(existing_parts, default=-1) + 1
+        else:
+            # Partitions from an earlier run would otherwise be read back alongside this one
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._next_part = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def _write_partitions(self, chunk):
+        years = pd.to_datetime(chunk[PARTITION_DATE_COLUMNS[self.table_name]]).dt.year.to_numpy()
+        for year in np.unique(years):
+            partition_dir = os.path.join(self.path, f'year={year}')
+            os.makedirs(partition_dir, exist_ok=True)
+            part = to_arrow_table(chunk[years == year], self.table_name)
+            pq.write_table(part, os.path.join(partition_dir, f'part-{self._next_part:05d}.parquet'))
+        self._next_part += 1
+
+    def write(self, chunk):
+        if self.stream:
+            if len(chunk):
+                self._write_partitions(chunk)
+        else:
+            self._pending_chunks.append(chunk)
+        self.rows_written += len(chunk)
+
+    def merge_part(self, part_dir, rows):
+        """Move the part files of the same table written under part_dir into this table, numbered after its own."""
+        self.close() # Rows written before the part come first
+        parts = table_files(part_dir, self.table_name, 'parquet')
+        part_numbers = sorted({os.path.basename(part) for part in parts})
+        for part in parts:
+            year_dir = os.path.basename(os.path.dirname(part))
+            partition_dir = os.path.join(self.path, year_dir)
+            os.makedirs(partition_dir, exist_ok=True)
+            part_number = self._next_part + part_numbers.index(os.path.basename(part))
+            os.replace(part, os.path.join(partition_dir, f'part-{part_number:05d}.parquet'))
+        self._next_part += len(part_numbers)
+        self.rows_written += rows
+
+    def close(self):
+        if not self.stream and self._pending_chunks:
+            self._write_partitions(pd.concat(self._pending_chunks, ignore_index=True))
+            self._pending_chunks = []
+
+
+def open_table_writer(output_dir, table_name, columns, output_format='csv', stream=True, append=False):
+    """Chunked writer for a fact table in the selected output format."""
+    writer_class = ParquetTableWriter if output_format == 'parquet' else CsvTableWriter
+    return writer_class(table_path(output_dir, table_name, output_format), table_name, columns, stream=stream, append=append)
+
+
+def table_files(output_dir, table_name, output_format='csv'):
+    """The files that make up a table, in a stable order (partitions by year, then part number)."""
+    path = table_path(output_dir, table_name, output_format)
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(path)
+        for name in names if name.endswith('.parquet')
+    )
+
+
+def iter_table_chunks(output_dir, table_name, output_format='csv', chunk_rows=100_000, columns=None):
+    """Read a generated table back in chunks of at most chunk_rows rows.
+
+    Both formats yield the same frames: columns in TABLE_SCHEMAS order (or the order
+    given), integer ids, and dates as 'YYYY-MM-DD' strings as they appear in the CSV output.
+    """
+    schema = {column: kind for column, kind in TABLE_SCHEMAS[table_name].items() if columns is None or column in columns}
+    columns = list(schema) if columns is None else list(columns)
+    if output_format == 'parquet':
+        if pq is None:
+            raise ImportError("Reading Parquet output needs pyarrow: pip install pyarrow")
+        for path in table_files(output_dir, table_name, output_format):
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+                chunk = batch.to_pandas()
+                for column, kind in schema.items():
+                    if kind == 'date':
+                        chunk[column] = pd.to_datetime(chunk[column]).dt.strftime('%Y-%m-%d')
+                yield chunk
+    else:
+        with pd.read_csv(table_path(output_dir, table_name, output_format), usecols=columns, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield chunk[columns]
+
+
+def read_table(output_dir, table_name, output_format='csv', columns=None):
+    """Read a whole generated table (or some of its columns) into one DataFrame."""
+    chunks = list(iter_table_chunks(output_dir, table_name, output_format, columns=columns))
+    if not chunks:
+        return pd.DataFrame(columns=list(TABLE_SCHEMAS[table_name]) if columns is None else list(columns))
+    return pd.concat(chunks, ignore_index=True)
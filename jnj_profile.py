@@ -0,0 +1,150 @@
+import cProfile
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError: # Not available on Windows; peak RSS is then left out of the report
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1) # Bytes on macOS, KB elsewhere
+
+
+class StageProfiler:
+    """Accumulates wall time, CPU time, peak memory and rows for named stages.
+
+    A stage can run many times (once per shard or per chunk); its calls are summed,
+    and its peaks are the highest seen. Stages measured in pool workers are merged in
+    with merge(), so their wall and CPU times add up across processes and can exceed
+    the run's elapsed time.
+
+    With trace_memory, tracemalloc's peak is reset at the start of every stage, so
+    each stage reports the most Python memory it allocated at once. With cprofile_dir,
+    every stage also runs under cProfile and is dumped to <cprofile_dir>/<prefix><stage>.prof.
+    """
+
+    def __init__(self, trace_memory=False, cprofile_dir=None, prefix=''):
+        self.trace_memory = trace_memory
+        self.cprofile_dir = cprofile_dir
+        self.prefix = prefix
+        self.stages = {}
+        self._profiles = {}
+        self._created = time.perf_counter()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def settings(self):
+        """What a worker needs to profile its own stages the same way."""
+        return {'trace_memory': self.trace_memory, 'cprofile_dir': self.cprofile_dir}
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        profile = None
+        if self.cprofile_dir:
+            profile = cProfile.Profile()
+            profile.enable()
+        return time.perf_counter(), time.process_time(), profile
+
+    def stop(self, name, token, rows=0):
+        wall_started, cpu_started, profile = token
+        if profile is not None:
+            profile.disable()
+            self._profiles.setdefault(name, []).append(profile)
+        self.record(name, {
+            'calls': 1,
+            'wall_seconds': time.perf_counter() - wall_started,
+            'cpu_seconds': time.process_time() - cpu_started,
+            'rows': int(rows),
+            'peak_traced_mb': round(tracemalloc.get_traced_memory()[1] / 2**20, 1) if self.trace_memory else None,
+            'peak_rss_mb': peak_rss_mb(),
+        })
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        """Measure the enclosed block; set counter['rows'] to the rows it produced."""
+        token = self.start()
+        counter = {'rows': rows}
+        try:
+            yield counter
+        finally:
+            self.stop(name, token, counter['rows'])
+
+    def record(self, name, measurement):
+        stage = self.stages.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows': 0,
+                                              'peak_traced_mb': None, 'peak_rss_mb': None})
+        for key in ('calls', 'wall_seconds', 'cpu_seconds', 'rows'):
+            stage[key] += measurement[key]
+        for key in ('peak_traced_mb', 'peak_rss_mb'):
+            if measurement[key] is not None:
+                stage[key] = max(stage[key] or 0, measurement[key])
+
+    def merge(self, stages):
+        """Fold in the stages measured by another profiler, e.g. one in a pool worker."""
+        for name, measurement in stages.items():
+            self.record(name, measurement)
+
+    def dump_profiles(self):
+        """Write one .prof file per stage measured under cProfile in this process."""
+        if not self.cprofile_dir:
+            return
+        os.makedirs(self.cprofile_dir, exist_ok=True)
+        for name, profiles in self._profiles.items():
+            stats = None
+            for profile in profiles:
+                profile.create_stats()
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            stats.dump_stats(os.path.join(self.cprofile_dir, f'{self.prefix}{name}.prof'))
+        self._profiles = {}
+
+    def report(self, **run_info):
+        """The measurements as a JSON-ready dict, stages in the order they first ran."""
+        return {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'total_wall_seconds': round(time.perf_counter() - self._created, 3),
+            'peak_rss_mb': peak_rss_mb(),
+            'environment': {
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'platform': platform.platform(),
+            },
+            'run': run_info,
+            'stages': [
+                {
+                    'stage': name,
+                    'calls': stage['calls'],
+                    'wall_seconds': round(stage['wall_seconds'], 3),
+                    'cpu_seconds': round(stage['cpu_seconds'], 3),
+                    'rows': stage['rows'],
+                    'rows_per_sec': round(stage['rows'] / stage['wall_seconds']) if stage['rows'] and stage['wall_seconds'] > 0 else None,
+                    'peak_traced_mb': stage['peak_traced_mb'],
+                    'peak_rss_mb': stage['peak_rss_mb'],
+                }
+                for name, stage in self.stages.items()
+            ],
+        }
+
+    def write_report(self, path, **run_info):
+        with open(path, 'w') as report_file:
+            json.dump(self.report(**run_info), report_file, indent=2)
+        return path
@@ -0,0 +1,170 @@
+import argparse
+import json
+import statistics
+import time
+
+# --- Query Layer Configuration ---
+# Summary tables and covering indexes for the analysis queries at the end of JnJ SQL.sql.
+# refresh_query_layer() rebuilds them from the fact tables; jnj_load.py runs it after every load.
+REPORT_PATH = 'query_timings.json'
+REPEATS = 5 # Runs per query; the median is reported
+
+# Bookings count towards the year they check in, as in the queries they replace
+SUMMARY_TABLES = {
+    'agg_property_year': (
+        'SELECT f.property_id, d.year, COUNT(*) AS bookings, SUM(f.nights) AS nights, SUM(f.revenue) AS revenue '
+        'FROM fact_bookings f JOIN dim_date d ON d.date_id = f.check_in_date_id '
+        'GROUP BY f.property_id, d.year'
+    ),
+    # Built from agg_property_year, so it never scans fact_bookings again
+    'agg_year_country_type': (
+        'SELECT a.year, p.country, p.property_type, COUNT(*) AS properties, SUM(a.bookings) AS bookings, '
+        'SUM(a.nights) AS nights, SUM(a.revenue) AS revenue '
+        'FROM agg_property_year a JOIN dim_property p ON p.property_id = a.property_id '
+        'GROUP BY a.year, p.country, p.property_type'
+    ),
+}
+
+QUERY_LAYER_INDEXES = [
+    # (table, index name, columns, unique); composite indexes list every column their queries read
+    ('agg_property_year', 'pk_agg_property_year', 'property_id, year', True),
+    ('agg_year_country_type', 'pk_agg_year_country_type', 'year, country, property_type', True),
+    ('fact_bookings', 'idx_bookings_check_in_property', 'check_in_date_id, property_id, nights, revenue', False),
+    ('dim_date', 'idx_date_year', 'year, date_id', False),
+    ('dim_property', 'idx_property_type_country', 'property_type, country, property_id, owner_id', False),
+]
+
+# --- Analysis Queries ---
+# name: (query over the raw tables, from JnJ SQL.sql; the same result from the query layer)
+ANALYSIS_QUERIES = {
+    'resort_revenue': (
+        "SELECT p.property_type, SUM(f.revenue) FROM dim_property p JOIN fact_bookings f ON f.property_id = p.property_id "
+        "WHERE p.property_type = 'Resort' GROUP BY p.property_type",
+        "SELECT property_type, SUM(revenue) FROM agg_year_country_type WHERE property_type = 'Resort' GROUP BY property_type",
+    ),
+    'resort_revenue_by_country_2020': (
+        "SELECT p.property_type, SUM(f.revenue), p.country FROM dim_property p "
+        "JOIN fact_bookings f ON p.property_id = f.property_id JOIN dim_date d ON f.check_in_date_id = d.date_id "
+        "WHERE p.property_type = 'Resort' AND d.year = 2020 GROUP BY p.property_type, p.country ORDER BY p.country",
+        "SELECT property_type, SUM(revenue), country FROM agg_year_country_type "
+        "WHERE property_type = 'Resort' AND year = 2020 GROUP BY property_type, country ORDER BY country",
+    ),
+    'revenue_by_year_country_type': (
+        "SELECT d.year, p.country, p.property_type, SUM(f.revenue) FROM fact_bookings f "
+        "JOIN dim_date d ON d.date_id = f.check_in_date_id JOIN dim_property p ON p.property_id = f.property_id "
+        "GROUP BY d.year, p.country, p.property_type ORDER BY d.year, p.country, p.property_type",
+        "SELECT year, country, property_type, revenue FROM agg_year_country_type ORDER BY year, country, property_type",
+    ),
+    'property_100_revenue_by_year': (
+        "SELECT d.year, SUM(f.revenue) FROM fact_bookings f JOIN dim_date d ON d.date_id = f.check_in_date_id "
+        "WHERE f.property_id = 100 GROUP BY d.year ORDER BY d.year",
+        "SELECT year, revenue FROM agg_property_year WHERE property_id = 100 ORDER BY year",
+    ),
+    'resort_owners': (
+        "SELECT DISTINCT o.owner_name, p.property_type, p.country FROM dim_owner o "
+        "JOIN dim_property p ON p.owner_id = o.owner_id WHERE p.property_type = 'Resort' ORDER BY o.owner_name, p.country",
+        # Same query; idx_property_type_country answers the filter and the join key from the index alone
+        "SELECT DISTINCT o.owner_name, p.property_type, p.country FROM dim_owner o "
+        "JOIN dim_property p ON p.owner_id = o.owner_id WHERE p.property_type = 'Resort' ORDER BY o.owner_name, p.country",
+    ),
+}
+
+
+def drop_query_layer(connection):
+    for _, index_name, _, _ in QUERY_LAYER_INDEXES:
+        connection.execute(f'DROP INDEX IF EXISTS {index_name}')
+    for table_name in reversed(SUMMARY_TABLES):
+        connection.execute(f'DROP TABLE IF EXISTS {table_name}')
+
+def refresh_query_layer(connection):
+    """Rebuild the summary tables and (re)create the covering indexes; returns the summary row counts."""
+    drop_query_layer(connection)
+    row_counts = {}
+    for table_name, select_sql in SUMMARY_TABLES.items():
+        connection.execute(f'CREATE TABLE {table_name} AS {select_sql}')
+        row_counts[table_name] = connection.execute(f'SELECT COUNT(*) FROM {table_name}').fetchone()[0]
+    for table_name, index_name, columns, unique in QUERY_LAYER_INDEXES:
+        connection.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {index_name} ON {table_name} ({columns})")
+    connection.commit()
+    return row_counts
+
+
+def time_query(connection, sql, repeats=REPEATS):
+    """Median wall time of a query in milliseconds, and its rows."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = connection.execute(sql).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), rows
+
+def same_rows(rows, expected):
+    """Row-by-row equality, with sums allowed to differ in their last float digits."""
+    if len(rows) != len(expected):
+        return False
+    for row, expected_row in zip(rows, expected):
+        for value, expected_value in zip(row, expected_row):
+            if isinstance(value, float) or isinstance(expected_value, float):
+                if abs(value - expected_value) > 1e-6 * max(1.0, abs(expected_value)):
+                    return False
+            elif value != expected_value:
+                return False
+    return True
+
+def benchmark_query_layer(connection, repeats=REPEATS):
+    """Time every analysis query on the bare tables, then with the covering indexes, then on the summary tables."""
+    drop_query_layer(connection)
+    before = {name: time_query(connection, raw_sql, repeats) for name, (raw_sql, _) in ANALYSIS_QUERIES.items()}
+
+    started = time.perf_counter()
+    summary_rows = refresh_query_layer(connection)
+    refresh_seconds = time.perf_counter() - started
+
+    fact_rows = connection.execute('SELECT COUNT(*) FROM fact_bookings').fetchone()[0]
+    report = {'fact_bookings_rows': fact_rows, 'refresh_seconds': round(refresh_seconds, 3),
+              'summary_rows': summary_rows, 'queries': []}
+    for name, (raw_sql, layer_sql) in ANALYSIS_QUERIES.items():
+        before_ms, expected = before[name]
+        indexed_ms, _ = time_query(connection, raw_sql, repeats)
+        after_ms, rows = time_query(connection, layer_sql, repeats)
+        report['queries'].append({
+            'query': name,
+            'before_ms': round(before_ms, 2),
+            'indexed_ms': round(indexed_ms, 2),
+            'after_ms': round(after_ms, 2),
+            'speedup': round(before_ms / after_ms, 1) if after_ms > 0 else None,
+            'results_match': same_rows(rows, expected),
+        })
+    return report
+
+
+def main():
+    from jnj_load import DATABASE_PATH, ENGINES, connect
+
+    parser = argparse.ArgumentParser(description="Build the summary tables and covering indexes and time the analysis queries.")
+    parser.add_argument('--engine', choices=ENGINES, default='sqlite', help="Engine of the database jnj_load.py built")
+    parser.add_argument('--database', default=DATABASE_PATH, help="Database file loaded by jnj_load.py")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="Runs per query; the median is reported")
+    parser.add_argument('--report', default=REPORT_PATH, help="Where to write the timings JSON")
+    args = parser.parse_args()
+
+    connection = connect(args.engine, args.database)
+    try:
+        report = benchmark_query_layer(connection, args.repeats)
+    finally:
+        connection.close()
+    report['engine'] = args.engine
+
+    print(f"{report['fact_bookings_rows']:,} fact_bookings rows on {args.engine}; "
+          f"query layer refreshed in {report['refresh_seconds']:.2f} s")
+    print(f"{'query':<32} {'before':>11} {'indexed':>11} {'after':>11} {'speedup':>8}")
+    for query in report['queries']:
+        print(f"{query['query']:<32} {query['before_ms']:>8.2f} ms {query['indexed_ms']:>8.2f} ms "
+              f"{query['after_ms']:>8.2f} ms {query['speedup'] or 0:>7.1f}x{'' if query['results_match'] else '  RESULTS DIFFER'}")
+    with open(args.report, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"Timings written to '{args.report}'.")
+
+
+if __name__ == '__main__':
+    main()
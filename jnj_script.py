@@ -1,12 +1,17 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta, date
+from datetime import timedelta, date
 from faker import Faker
 import os
 import random
+import shutil
+import sys
+import argparse
+from multiprocessing import Pool
 
-# Initialize Faker
-fake = Faker()
+from jnj_output import OUTPUT_FORMATS, open_table_writer, read_table, table_path, write_table
+from jnj_profile import StageProfiler
+from jnj_validate import validate_warehouse
 
 # --- Configuration Parameters ---
 START_DATE = date(2020, 1, 1)
@@ -19,14 +24,8 @@ TARGET_OCCUPANCY_RATE_OVERALL = 0.55 # Overall target across all properties
 AVG_BOOKING_DURATION_DAYS = 5 # Average length of a booking
 
 OUTPUT_DIR = 'synthetic_booking_data_v2'
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-print("Starting V2 data generation...")
-
-# --- Global Date Calculations ---
-total_days_in_period = (END_DATE - START_DATE).days + 1
-# Convert END_DATE to datetime object for consistent comparisons later
-END_DATE_DATETIME = datetime.combine(END_DATE, datetime.min.time())
+OUTPUT_FORMAT = 'csv' # 'csv' or 'parquet' (year-partitioned, dictionary-encoded; needs pyarrow)
+SEED = None # Single seed for Faker, random and NumPy; None draws fresh entropy (printed so the run can be replayed)
 
 # --- Property Type & Amenity Configuration ---
 PROPERTY_TYPES_CONFIG = {
@@ -45,6 +44,14 @@ BASIC_AMENITIES = ['WiFi', 'Hot Water', 'Air Conditioning', 'Balcony', 'Kitchene
 LUXURY_AMENITIES_GENERAL = ['Fireplace', 'Gym', 'Hot Tub', 'Game Room', 'Home Theater']
 LUXURY_AMENITIES_OUTDOOR_LARGE = ['Swimming Pool', 'Private Beach Access', 'Rooftop Terrace'] # More suited for House, Villa, Resort
 
+# Every amenity gets a bit in dim_property.amenity_mask and a row in dim_amenity (amenity_id = bit + 1)
+AMENITY_GROUPS = {
+    'Basic': BASIC_AMENITIES,
+    'Luxury General': LUXURY_AMENITIES_GENERAL,
+    'Luxury Outdoor': LUXURY_AMENITIES_OUTDOOR_LARGE,
+}
+AMENITY_BITS = {amenity: bit for bit, amenity in enumerate(amenity for group in AMENITY_GROUPS.values() for amenity in group)}
+
 # --- Owner Categorization ---
 OWNER_CATEGORIES_CONFIG = {
     'Sole Proprietor': {'count': int(NUM_OWNERS * 0.40), 'properties_per_owner': 1}, # 40% are sole
@@ -63,6 +70,10 @@ if total_assigned_owners != NUM_OWNERS:
 NUM_TENANTS = 1000 # Number of unique tenants
 TENANT_REPEAT_PROB = 0.3 # 30% chance a booking is from a returning tenant
 BOOKING_PURPOSES = ['Holiday Fun', 'Business Meeting', 'Personal Getaway', 'Family Gathering', 'Event Accommodation']
+TENANT_REPEAT_PROB_BY_PURPOSE = { # Purposes not listed use TENANT_REPEAT_PROB
+    'Business Meeting': 0.45, # Business travellers return most often
+    'Event Accommodation': 0.15, # Mostly one-off trips
+}
 
 REVIEW_RATING_DISTRIBUTION = {
     5: 0.60, # 60% chance of 5-star review
@@ -81,257 +92,261 @@ REVIEW_COMMENTS = {
 }
 
 
-print("Generating dim_date...")
+# --- Random Sources ---
+# Every stage gets its own child of one SeedSequence, so a stage's output depends only on
+# the seed and its own inputs, not on how much randomness earlier stages consumed.
+RANDOM_STAGES = ['dim_owner', 'dim_property', 'dim_tenant', 'facts', 'fact_reviews', 'pending_reviews'] # Append only: positions key the seeds
+
+def make_random_sources(seed_sequence):
+    """Build a NumPy Generator, a random.Random and a seeded Faker from one SeedSequence."""
+    py_random_state, faker_state = seed_sequence.generate_state(2)
+    rng = np.random.default_rng(seed_sequence)
+    py_random = random.Random(int(py_random_state))
+    fake = Faker()
+    fake.seed_instance(int(faker_state))
+    return rng, py_random, fake
+
+def derive_stage_seeds(seed=None):
+    """Split one seed into a SeedSequence per entry of RANDOM_STAGES."""
+    root = np.random.SeedSequence(seed)
+    return root, dict(zip(RANDOM_STAGES, root.spawn(len(RANDOM_STAGES))))
+
+def derive_window_seed(root, window_start_id, stage='facts'):
+    """Seed for a fact stage of an incremental window, distinct from the full run and from other windows."""
+    return np.random.SeedSequence(root.entropy, spawn_key=(RANDOM_STAGES.index(stage), window_start_id))
+
+
+# --- Bulk Identities ---
+# Names, emails and phones for owners and tenants are composed from small component pools
+# sampled from Faker once, instead of calling Faker for every row. Each email carries a
+# number drawn from a permutation of the row numbers, so emails are unique by construction.
+IDENTITY_POOL_SIZE = 1_000 # First names, last names and domains sampled from Faker per pool
+
+def sample_identity_pools(fake):
+    """Draw the name and email-domain pools, pre-joined with their separators so rows need fewer concatenations."""
+    to_local_part = lambda name: ''.join(ch for ch in name.lower() if ch.isalnum()) # Email-safe form of a name
+    first_names = [fake.first_name() for _ in range(IDENTITY_POOL_SIZE)]
+    last_names = [fake.last_name() for _ in range(IDENTITY_POOL_SIZE)]
+    domains = sorted({fake.free_email_domain() for _ in range(IDENTITY_POOL_SIZE)})
+    codes = [str(code) for code in range(200, 1000)] # Area codes and exchanges never start with 0 or 1
+    return {
+        'first_names': np.array([name + ' ' for name in first_names], dtype=object),
+        'last_names': np.array(last_names, dtype=object),
+        'first_locals': np.array([to_local_part(name) + '.' for name in first_names], dtype=object),
+        'last_locals': np.array([to_local_part(name) for name in last_names], dtype=object),
+        'domains': np.array(['@' + domain for domain in domains], dtype=object),
+        'phone_codes': np.array([code + '-' for code in codes], dtype=object),
+        'phone_lines': np.array([f'{line:04d}' for line in range(10_000)], dtype=object),
+    }
+
+def generate_identities(rng, fake, count):
+    """Compose count (name, email, phone) rows, with every email unique, as whole columns."""
+    pools = sample_identity_pools(fake)
+    first = rng.integers(len(pools['first_names']), size=count)
+    last = rng.integers(len(pools['last_names']), size=count)
+    email_number = (rng.permutation(count) + 1).astype(str).astype(object) # Distinct per row, so no two emails can collide
+
+    names = pools['first_names'][first] + pools['last_names'][last]
+    emails = (pools['first_locals'][first] + pools['last_locals'][last] + email_number
+              + pools['domains'][rng.integers(len(pools['domains']), size=count)])
+    phone_codes = pools['phone_codes']
+    phones = (phone_codes[rng.integers(len(phone_codes), size=count)] + phone_codes[rng.integers(len(phone_codes), size=count)]
+              + pools['phone_lines'][rng.integers(len(pools['phone_lines']), size=count)])
+    return names, emails, phones
+
+
 # --- 1. Generate dim_date ---
-date_id = 0
-dates_list = []
-date_to_id_map = {} # New: To store date -> date_id mapping for fact tables
-current_date = START_DATE
-while current_date <= END_DATE:
-    dates_list.append({
-        'date_id': date_id,
-        'date': current_date,
-        'year': current_date.year,
-        'quarter': (current_date.month - 1) // 3 + 1,
-        'month': current_date.month,
-        'day': current_date.day,
-        'weekday': current_date.weekday() # Monday=0, Sunday=6
-    })
-    date_to_id_map[current_date] = date_id # Store mapping
-    current_date += timedelta(days=1)
-    date_id += 1
-dim_date = pd.DataFrame(dates_list)
-dim_date.to_csv(os.path.join(OUTPUT_DIR, 'dim_date.csv'), index=False)
-print(f"dim_date generated with {len(dim_date)} rows.")
-
-print("Generating dim_owner...")
-# --- 2. Generate dim_owner (with categories and UNIQUE emails) ---
-owners_list = []
-owner_id_counter = 1
-generated_emails = set() # To store and check for unique emails
-
-for category, config in OWNER_CATEGORIES_CONFIG.items():
-    for _ in range(config['count']):
-        owner_email = fake.email()
-        # Ensure unique email
-        while owner_email in generated_emails:
-            owner_email = fake.email()
-        generated_emails.add(owner_email)
-
-        owners_list.append({
-            'owner_id': owner_id_counter,
-            'owner_name': fake.name(),
-            'owner_email': owner_email,
-            'owner_phone': fake.phone_number(),
-            'owner_category': category
+def generate_dim_date(first_date=None, last_date=None, origin_date=None):
+    # Defaults are read at call time, so START_DATE/END_DATE can be changed after import
+    first_date = first_date or START_DATE
+    last_date = last_date or END_DATE
+    origin_date = origin_date or START_DATE
+    dates_list = []
+    current_date = first_date
+    while current_date <= last_date:
+        dates_list.append({
+            'date_id': (current_date - origin_date).days, # date_id is the day offset from the first date in the dataset
+            'date': current_date,
+            'year': current_date.year,
+            'quarter': (current_date.month - 1) // 3 + 1,
+            'month': current_date.month,
+            'day': current_date.day,
+            'weekday': current_date.weekday() # Monday=0, Sunday=6
         })
-        owner_id_counter += 1
-dim_owner = pd.DataFrame(owners_list)
-dim_owner.to_csv(os.path.join(OUTPUT_DIR, 'dim_owner.csv'), index=False)
-print(f"dim_owner generated with {len(dim_owner)} rows.")
+        current_date += timedelta(days=1)
+    return pd.DataFrame(dates_list)
 
-print("Generating dim_platform...")
-# --- 3. Generate dim_platform ---
-platform_names = ['Airbnb', 'Booking.com', 'Direct Website', 'Expedia', 'Vrbo', 'TripAdvisor', 'Agoda']
-platforms_list = []
-for i, name in enumerate(platform_names[:NUM_PLATFORMS]):
-    platforms_list.append({
-        'platform_id': i + 1,
-        'platform_name': name
+
+# --- 2. Generate dim_owner (with categories and UNIQUE emails) ---
+def generate_dim_owner(rng, fake):
+    categories = list(OWNER_CATEGORIES_CONFIG.keys())
+    owner_category = np.repeat(categories, [OWNER_CATEGORIES_CONFIG[category]['count'] for category in categories])
+    owner_name, owner_email, owner_phone = generate_identities(rng, fake, len(owner_category))
+    return pd.DataFrame({
+        'owner_id': np.arange(1, len(owner_category) + 1),
+        'owner_name': owner_name,
+        'owner_email': owner_email,
+        'owner_phone': owner_phone,
+        'owner_category': owner_category
     })
-dim_platform = pd.DataFrame(platforms_list)
-dim_platform.to_csv(os.path.join(OUTPUT_DIR, 'dim_platform.csv'), index=False)
-print(f"dim_platform generated with {len(dim_platform)} rows.")
 
-print("Generating dim_property...")
+
+# --- 3. Generate dim_platform ---
+def generate_dim_platform():
+    platform_names = ['Airbnb', 'Booking.com', 'Direct Website', 'Expedia', 'Vrbo', 'TripAdvisor', 'Agoda']
+    platforms_list = []
+    for i, name in enumerate(platform_names[:NUM_PLATFORMS]):
+        platforms_list.append({
+            'platform_id': i + 1,
+            'platform_name': name
+        })
+    return pd.DataFrame(platforms_list)
+
+
 # --- 4. Generate dim_property (with amenity logic and price adjustments) ---
-property_types = list(PROPERTY_TYPES_CONFIG.keys())
-countries = ['USA', 'Canada']
-# Generate specific major cities in USA and Canada for better realism
-us_cities = [fake.city() for _ in range(NUM_PROPERTIES // 8)] # ~75 US cities
-ca_cities = [fake.city() for _ in range(NUM_PROPERTIES // 12)] # ~50 CA cities
-all_cities = us_cities + ca_cities
-
-properties_list = []
-property_id_counter = 1
-
-# Assign properties to owners based on categories
-owner_category_map = {cat: [] for cat in OWNER_CATEGORIES_CONFIG.keys()}
-for idx, owner_row in dim_owner.iterrows():
-    owner_category_map[owner_row['owner_category']].append(owner_row['owner_id'])
-
-# Distribute properties to owners ensuring category rules are followed
-assigned_properties_count = 0
-for category, config in OWNER_CATEGORIES_CONFIG.items():
-    owner_ids_in_category = owner_category_map[category]
-    random.shuffle(owner_ids_in_category) # Shuffle owners to distribute properties
-    
-    current_owner_idx = 0
-    while current_owner_idx < len(owner_ids_in_category) and assigned_properties_count < NUM_PROPERTIES:
-        owner_id = owner_ids_in_category[current_owner_idx]
-        
-        props_to_assign = 1 # Default for Sole/Family(1)
-        if isinstance(config['properties_per_owner'], tuple): # For ranges
-            props_to_assign = random.randint(config['properties_per_owner'][0], config['properties_per_owner'][1])
-        
-        # Ensure we don't exceed NUM_PROPERTIES
-        props_to_assign = min(props_to_assign, NUM_PROPERTIES - assigned_properties_count)
-
-        for _ in range(props_to_assign):
-            if assigned_properties_count >= NUM_PROPERTIES:
-                break
+def generate_dim_property(dim_owner, rng, py_random, fake):
+    property_types = list(PROPERTY_TYPES_CONFIG.keys())
+    countries = ['USA', 'Canada']
+    # Generate specific major cities in USA and Canada for better realism
+    us_cities = [fake.city() for _ in range(NUM_PROPERTIES // 8)] # ~75 US cities
+    ca_cities = [fake.city() for _ in range(NUM_PROPERTIES // 12)] # ~50 CA cities
+
+    properties_list = []
+    property_id_counter = 1
+
+    # Assign properties to owners based on categories
+    owner_category_map = {cat: [] for cat in OWNER_CATEGORIES_CONFIG.keys()}
+    for idx, owner_row in dim_owner.iterrows():
+        owner_category_map[owner_row['owner_category']].append(owner_row['owner_id'])
+
+    # Distribute properties to owners ensuring category rules are followed
+    assigned_properties_count = 0
+    for category, config in OWNER_CATEGORIES_CONFIG.items():
+        owner_ids_in_category = owner_category_map[category]
+        py_random.shuffle(owner_ids_in_category) # Shuffle owners to distribute properties
+
+        current_owner_idx = 0
+        while current_owner_idx < len(owner_ids_in_category) and assigned_properties_count < NUM_PROPERTIES:
+            owner_id = owner_ids_in_category[current_owner_idx]
+
+            props_to_assign = 1 # Default for Sole/Family(1)
+            if isinstance(config['properties_per_owner'], tuple): # For ranges
+                props_to_assign = py_random.randint(config['properties_per_owner'][0], config['properties_per_owner'][1])
+
+            # Ensure we don't exceed NUM_PROPERTIES
+            props_to_assign = min(props_to_assign, NUM_PROPERTIES - assigned_properties_count)
+
+            for _ in range(props_to_assign):
+                if assigned_properties_count >= NUM_PROPERTIES:
+                    break
+
+                prop_type = rng.choice(property_types)
+                prop_config = PROPERTY_TYPES_CONFIG[prop_type]
+
+                # Assign amenities based on property type and luxury probability
+                amenities = BASIC_AMENITIES[:] # Start with all basic amenities
+                if py_random.random() < prop_config['amenity_luxury_prob']: # Chance for luxury amenities
+                    # Add general luxury amenities
+                    amenities.append(py_random.choice(LUXURY_AMENITIES_GENERAL))
+
+                    # Add outdoor/large luxury amenities based on property type compatibility
+                    # Corrected typo here: 'luxury_amenities_pool_rooft0op_gym' -> 'luxury_amenities_pool_rooftop_gym'
+                    if prop_config['luxury_amenities_pool_rooftop_gym'] and py_random.random() < 0.5: # 50% chance for these compatible types
+                         amenities.append(py_random.choice(LUXURY_AMENITIES_OUTDOOR_LARGE))
+
+                # Calculate base price based on property's base price and amenities
+                # Add a small premium for each luxury amenity
+                luxury_premium = len(amenities) - len(BASIC_AMENITIES) # Count added luxury amenities
+                base_price = round(AVG_ADR * prop_config['base_adr_factor'] * rng.uniform(0.9, 1.1) + (luxury_premium * 20), 2)
+                base_price = max(50, base_price) # Ensure a minimum price
+
+                country = rng.choice(countries)
+                city_pool = us_cities if country == 'USA' else ca_cities
+                city = rng.choice(city_pool)
+
+                properties_list.append({
+                    'property_id': property_id_counter,
+                    'owner_id': owner_id,
+                    'property_type': prop_type,
+                    'country': country,
+                    'city': city,
+                    'distance_to_city_center': round(rng.uniform(1, 20), 2),
+                    'amenities': ", ".join(sorted(list(set(amenities)))), # Unique and sorted amenities
+                    'amenity_mask': sum(1 << AMENITY_BITS[amenity] for amenity in set(amenities)),
+                    'base_price': base_price
+                })
+                property_id_counter += 1
+                assigned_properties_count += 1
+            current_owner_idx += 1
+
+    return pd.DataFrame(properties_list)
+
+
+# --- 4b. Generate dim_amenity and the property_amenity bridge ---
+def generate_dim_amenity():
+    return pd.DataFrame({
+        'amenity_id': [bit + 1 for bit in AMENITY_BITS.values()],
+        'amenity_name': list(AMENITY_BITS),
+        'amenity_group': [group for group, amenities in AMENITY_GROUPS.items() for _ in amenities],
+        'amenity_bit': list(AMENITY_BITS.values()),
+    })
+
+def generate_property_amenity(dim_property):
+    """One (property_id, amenity_id) row per set bit of each property's amenity_mask."""
+    masks = dim_property['amenity_mask'].to_numpy()
+    has_amenity = (masks[:, None] >> np.arange(len(AMENITY_BITS))) & 1
+    property_row, bit = np.nonzero(has_amenity)
+    return pd.DataFrame({
+        'property_id': dim_property['property_id'].to_numpy()[property_row],
+        'amenity_id': bit + 1,
+    })
+
 
-            prop_type = np.random.choice(property_types)
-            prop_config = PROPERTY_TYPES_CONFIG[prop_type]
-
-            # Assign amenities based on property type and luxury probability
-            amenities = BASIC_AMENITIES[:] # Start with all basic amenities
-            if random.random() < prop_config['amenity_luxury_prob']: # Chance for luxury amenities
-                # Add general luxury amenities
-                amenities.append(random.choice(LUXURY_AMENITIES_GENERAL))
-                
-                # Add outdoor/large luxury amenities based on property type compatibility
-                # Corrected typo here: 'luxury_amenities_pool_rooft0op_gym' -> 'luxury_amenities_pool_rooftop_gym'
-                if prop_config['luxury_amenities_pool_rooftop_gym'] and random.random() < 0.5: # 50% chance for these compatible types
-                     amenities.append(random.choice(LUXURY_AMENITIES_OUTDOOR_LARGE))
-            
-            # Calculate base price based on property's base price and amenities
-            # Add a small premium for each luxury amenity
-            luxury_premium = len(amenities) - len(BASIC_AMENITIES) # Count added luxury amenities
-            base_price = round(AVG_ADR * prop_config['base_adr_factor'] * np.random.uniform(0.9, 1.1) + (luxury_premium * 20), 2)
-            base_price = max(50, base_price) # Ensure a minimum price
-
-            country = np.random.choice(countries)
-            city_pool = us_cities if country == 'USA' else ca_cities
-            city = np.random.choice(city_pool)
-
-            properties_list.append({
-                'property_id': property_id_counter,
-                'owner_id': owner_id,
-                'property_type': prop_type,
-                'country': country,
-                'city': city,
-                'distance_to_city_center': round(np.random.uniform(1, 20), 2),
-                'amenities': ", ".join(sorted(list(set(amenities)))), # Unique and sorted amenities
-                'base_price': base_price
-            })
-            property_id_counter += 1
-            assigned_properties_count += 1
-        current_owner_idx += 1
-
-dim_property = pd.DataFrame(properties_list)
-dim_property.to_csv(os.path.join(OUTPUT_DIR, 'dim_property.csv'), index=False)
-print(f"dim_property generated with {len(dim_property)} rows.")
-
-print("Generating dim_tenant...")
 # --- 5. Generate dim_tenant ---
-tenants_list = []
-# To also handle potential duplicate emails for tenants if NUM_TENANTS is very large
-generated_tenant_emails = set()
-for i in range(NUM_TENANTS):
-    tenant_email = fake.email()
-    while tenant_email in generated_tenant_emails:
-        tenant_email = fake.email()
-    generated_tenant_emails.add(tenant_email)
-
-    tenants_list.append({
-        'tenant_id': i + 1,
-        'tenant_name': fake.name(),
+def generate_dim_tenant(rng, fake):
+    tenant_name, tenant_email, tenant_phone = generate_identities(rng, fake, NUM_TENANTS)
+    return pd.DataFrame({
+        'tenant_id': np.arange(1, NUM_TENANTS + 1),
+        'tenant_name': tenant_name,
         'tenant_email': tenant_email,
-        'tenant_phone': fake.phone_number()
+        'tenant_phone': tenant_phone
     })
-dim_tenant = pd.DataFrame(tenants_list)
-dim_tenant.to_csv(os.path.join(OUTPUT_DIR, 'dim_tenant.csv'), index=False)
-print(f"dim_tenant generated with {len(dim_tenant)} rows.")
 
 
-print("Generating fact_bookings...")
 # --- 6. Generate fact_bookings (Revised for distribution, occupancy, platform variation) ---
-bookings_data = []
-booking_id_counter = 1
-
-# --- Helper to calculate total available nights for a property type ---
-def get_total_available_nights_for_type(prop_type_name, num_properties_of_type):
-    return num_properties_of_type * total_days_in_period
-
-# --- Phase 1: Guaranteed Bookings for Each Property across All Years ---
-# This ensures every property has data in every year
-MIN_BOOKINGS_PER_PROPERTY_PER_YEAR = 1 # Minimum 1 booking per property per year
-print("Generating guaranteed bookings for all properties across all years...")
-for year in range(START_DATE.year, END_DATE.year + 1):
-    year_start = max(START_DATE, date(year, 1, 1))
-    year_end = min(END_DATE, date(year, 12, 31))
-    
-    days_in_current_year = (year_end - year_start).days + 1
-    
-    if days_in_current_year > 0: # Ensure year has days in the range
-        for prop_id in dim_property['property_id'].unique():
-            num_guaranteed_bookings_this_year = np.random.randint(MIN_BOOKINGS_PER_PROPERTY_PER_YEAR, MIN_BOOKINGS_PER_PROPERTY_PER_YEAR + 1) # 1 booking
-            
-            for _ in range(num_guaranteed_bookings_this_year):
-                # Ensure check_in and check_out are within the current year's range
-                # Ensure the range for randint is valid (at least 0)
-                check_in_offset_range = max(0, days_in_current_year - AVG_BOOKING_DURATION_DAYS)
-                check_in_offset = np.random.randint(0, check_in_offset_range + 1) if check_in_offset_range >= 0 else 0
-                
-                check_in_date = year_start + timedelta(days=check_in_offset)
-                
-                nights = max(1, int(np.random.normal(AVG_BOOKING_DURATION_DAYS, AVG_BOOKING_DURATION_DAYS / 2)))
-                check_out_date = check_in_date + timedelta(days=nights)
-                
-                if check_out_date > year_end:
-                    check_out_date = year_end
-                    nights = (check_out_date - check_in_date).days
-                
-                if nights >= 1: # Only add if still valid
-                    platform_id = np.random.choice(dim_platform['platform_id']) # Random platform for guaranteed bookings
-                    revenue = round(nights * (AVG_ADR * np.random.uniform(0.8, 1.2)), 2)
-                    damage_flag = np.random.choice([0, 1], p=[0.98, 0.02]) # Lower damage chance
-                    damage_cost = round(np.random.uniform(50, 500), 2) if damage_flag == 1 else 0
-                    turnover_flag = np.random.choice([0, 1], p=[0.75, 0.25]) # Higher turnover chance
-
-                    # Ensure check_in_date and check_out_date are valid keys in date_to_id_map
-                    check_in_date_id = date_to_id_map.get(check_in_date, None)
-                    check_out_date_id = date_to_id_map.get(check_out_date, None)
-
-                    if check_in_date_id is not None and check_out_date_id is not None:
-                        bookings_data.append({
-                            'booking_id': booking_id_counter,
-                            'property_id': prop_id,
-                            'platform_id': platform_id,
-                            'tenant_id': np.random.choice(dim_tenant['tenant_id']), # Initial tenant
-                            'check_in_date_id': check_in_date_id, # NEW: Add check_in_date_id
-                            'check_out_date_id': check_out_date_id, # NEW: Add check_out_date_id
-                            'check_in': check_in_date.strftime('%Y-%m-%d'),
-                            'check_out': check_out_date.strftime('%Y-%m-%d'),
-                            'nights': nights,
-                            'revenue': revenue,
-                            'purpose_of_stay': np.random.choice(BOOKING_PURPOSES),
-                            'damage_flag': damage_flag,
-                            'damage_cost': damage_cost,
-                            'turnover_flag': turnover_flag
-                        })
-                        booking_id_counter += 1
-
-print(f"Generated {len(bookings_data)} guaranteed bookings.")
-
-# --- Phase 2: Generate Remaining Bookings to hit Target Occupancy with Variances ---
-# Calculate total bookings needed based on target occupancy for each property type
-total_bookings_target = 0
-for prop_type, config in PROPERTY_TYPES_CONFIG.items():
-    num_props_of_type = dim_property[dim_property['property_type'] == prop_type].shape[0]
-    total_nights_available_for_type = num_props_of_type * total_days_in_period
-    target_nights_booked_for_type = int(total_nights_available_for_type * config['target_occupancy'])
-    total_bookings_target += int(target_nights_booked_for_type / AVG_BOOKING_DURATION_DAYS)
-
-# Adjust for bookings already guaranteed
-num_initial_bookings = len(bookings_data)
-# Add some buffer to ensure target is met after random drops
-remaining_bookings_to_generate = max(0, total_bookings_target - num_initial_bookings) + int(total_bookings_target * 0.1) # 10% buffer
-print(f"Targeting total {total_bookings_target} bookings. Generating {remaining_bookings_to_generate} additional random bookings.")
-
-# Store property_ids grouped by type for weighted random selection
-property_ids_by_type = {pt: dim_property[dim_property['property_type'] == pt]['property_id'].tolist() for pt in PROPERTY_TYPES_CONFIG.keys()}
+# Bookings are drawn in whole chunks as NumPy arrays rather than one dict at a time.
+# date_id is the day offset from the dataset's first date, so check-in/check-out ids come straight from the offsets.
+BOOKING_CHUNK_SIZE = 100_000 # Rows drawn per vectorized batch
+STREAM_OUTPUT = True # Append each chunk to the fact tables as it is generated; False writes each table in one call
+BOOKING_COLUMNS = ['booking_id', 'property_id', 'platform_id', 'tenant_id', 'check_in_date_id', 'check_out_date_id',
+                   'check_in', 'check_out', 'nights', 'revenue', 'purpose_of_stay', 'damage_flag', 'damage_cost', 'turnover_flag']
+PROPERTY_OCCUPANCY_SPREAD = 0.05 # Std dev of each property's target occupancy around its type's target_occupancy
+RECENT_TENANT_WINDOW = 500 # Returning tenants are picked from this many most recent bookings
+MIN_BOOKINGS_BEFORE_REPEATS = 100 # Ensure some history before repeating
+
+# --- Tenant History ---
+# Each shard keeps two fixed-size buffers of past guests: the tenants of its RECENT_TENANT_WINDOW
+# most recent bookings, and a ring of the last PROPERTY_GUEST_MEMORY guests of every property.
+# A returning guest is one index into either buffer, so a repeat costs the same however long
+# the history grows.
+SAME_PROPERTY_REPEAT_SHARE = 0.4 # Share of returning guests who rebook a property they stayed at before
+PROPERTY_GUEST_MEMORY = 8 # Past guests remembered per property
+
+# --- Availability Index ---
+# Each property's free nights are kept as sorted gaps [start, end) over date_ids. Phase 2 lays
+# stays out inside the free gaps and carves them out again, so no property is ever double-booked.
+# Placement never rejects a draw, so a round costs the same however full the calendar gets.
+# The gaps run STAY_LOOKAROUND_NIGHTS past both ends of the window and stays are then clipped to
+# it, so a window edge cuts through stays like any other night instead of starting a fresh calendar.
+STAY_LOOKAROUND_NIGHTS = 30
+
+# --- Sharded Generation ---
+# Bookings and reviews are generated per shard of SHARD_SIZE consecutive properties.
+# The shard layout depends only on NUM_PROPERTIES, never on the worker count, so every
+# worker count produces the same shards, the same per-shard seeds and the same output.
+SHARD_SIZE = 1_000 # Properties per shard
+NUM_WORKERS = 1 # Processes in the generation pool; 1 runs the shards in this process
+SHARD_PARTS_DIR = '_shard_parts' # Folder in OUTPUT_DIR where pool workers write their shards before the merge
 
 # Store platform_ids and their general performance biases
 # Higher weight means more likely to be picked for overall bookings
@@ -344,147 +359,791 @@ PLATFORM_BIAS = {
     'TripAdvisor': 0.6, # Weaker
     'Agoda': 0.5 # Weaker
 }
-platform_names_ordered = [p['platform_name'] for p in platforms_list] # Ensure order for indexing
-platform_weights = [PLATFORM_BIAS[name] for name in platform_names_ordered]
-platform_ids_weighted = random.choices(dim_platform['platform_id'].tolist(), weights=platform_weights, k=10000) # Pre-generate weighted choices
-
-for _ in range(remaining_bookings_to_generate):
-    # Weighted random selection of property type based on target occupancy
-    # Then select a property from that type
-    selected_prop_type = random.choices(
-        list(PROPERTY_TYPES_CONFIG.keys()), 
-        weights=[PROPERTY_TYPES_CONFIG[pt]['target_occupancy'] * len(property_ids_by_type[pt]) for pt in PROPERTY_TYPES_CONFIG.keys()],
-        k=1
-    )[0]
-    
-    # Pick a random property ID from the selected type
-    property_id = np.random.choice(property_ids_by_type[selected_prop_type])
-    
+
+def build_booking_context(dim_property, dim_platform, dim_tenant, dim_date, window_start_id=None):
+    """Precompute the lookup arrays the vectorized booking engine draws from.
+
+    Bookings are placed between window_start_id and the last date in dim_date; by
+    default that is the whole of dim_date. The last date is a check-out day only, as no
+    stay can check out after it, so a window that extends a dataset also books the
+    night of the previous last date (first_night_id). Per-property arrays are aligned
+    with the sorted property_ids, so a property's row is np.searchsorted(property_ids, id).
+    """
+    dim_property = dim_property.sort_values('property_id')
+    target_occupancy = dim_property['property_type'].map(
+        {pt: config['target_occupancy'] for pt, config in PROPERTY_TYPES_CONFIG.items()}).to_numpy(dtype=np.float64)
+
+    # base_price indexed by property_id replaces a boolean scan of dim_property per booking
+    base_price_by_property = np.zeros(dim_property['property_id'].max() + 1)
+    base_price_by_property[dim_property['property_id'].to_numpy()] = dim_property['base_price'].to_numpy()
+
+    platform_weights = np.array([PLATFORM_BIAS[name] for name in dim_platform['platform_name']])
+    date_strings = dim_date.sort_values('date_id')['date'].astype(str).to_numpy() # Indexed by date_id
+    return {
+        'property_ids': dim_property['property_id'].to_numpy(),
+        'target_occupancy': target_occupancy,
+        'base_price_by_property': base_price_by_property,
+        'platform_ids': dim_platform['platform_id'].to_numpy(),
+        'platform_probs': platform_weights / platform_weights.sum(),
+        'num_tenants': int(dim_tenant['tenant_id'].max()), # tenant_id runs 1..NUM_TENANTS
+        'date_strings': date_strings,
+        'window_start_id': 0 if window_start_id is None else int(window_start_id),
+        'first_night_id': 0 if not window_start_id else int(window_start_id) - 1,
+        'window_end_id': len(date_strings) - 1,
+    }
+
+def draw_nights(rng, size):
+    """Booking lengths: normal around AVG_BOOKING_DURATION_DAYS, truncated like int() and at least 1."""
+    return np.maximum(1, np.trunc(rng.normal(AVG_BOOKING_DURATION_DAYS, AVG_BOOKING_DURATION_DAYS / 2, size)).astype(np.int64))
+
+def draw_damage_and_turnover(rng, size):
+    damage_flag = (rng.random(size) < 0.02).astype(np.int64) # Lower damage chance
+    damage_cost = np.where(damage_flag == 1, np.round(rng.uniform(50, 500, size), 2), 0.0)
+    turnover_flag = (rng.random(size) < 0.25).astype(np.int64) # Higher turnover chance
+    return damage_flag, damage_cost, turnover_flag
+
+def assemble_bookings_frame(context, first_booking_id, property_id, platform_id, tenant_id,
+                            check_in_date_id, check_out_date_id, revenue, purpose_of_stay,
+                            damage_flag, damage_cost, turnover_flag):
+    """Lay out one batch of booking columns in the fact_bookings schema order."""
+    date_strings = context['date_strings']
+    return pd.DataFrame({
+        'booking_id': np.arange(first_booking_id, first_booking_id + len(property_id)),
+        'property_id': property_id,
+        'platform_id': platform_id,
+        'tenant_id': tenant_id,
+        'check_in_date_id': check_in_date_id,
+        'check_out_date_id': check_out_date_id,
+        'check_in': date_strings[check_in_date_id],
+        'check_out': date_strings[check_out_date_id],
+        'nights': check_out_date_id - check_in_date_id,
+        'revenue': revenue,
+        'purpose_of_stay': purpose_of_stay,
+        'damage_flag': damage_flag,
+        'damage_cost': damage_cost,
+        'turnover_flag': turnover_flag
+    })
+
+def draw_property_targets(rng, type_target):
+    """Each property's target occupancy: normal around its type's target, recentred so every type still averages its target."""
+    types, type_code = np.unique(type_target, return_inverse=True)
+    deviation = rng.normal(0, PROPERTY_OCCUPANCY_SPREAD, len(type_target))
+    deviation -= (np.bincount(type_code, weights=deviation) / np.bincount(type_code))[type_code]
+    return np.clip(type_target + deviation, 0.05, 0.95)
+
+def generate_guaranteed_bookings(rng, context, year_start_id, year_end_id, first_booking_id):
+    """Phase 1 for one year: one booking per property, kept inside [year_start_id, year_end_id]."""
+    property_ids = context['property_ids']
+    n = len(property_ids)
+    days_in_current_year = year_end_id - year_start_id + 1
+    check_in_offset_range = max(0, days_in_current_year - AVG_BOOKING_DURATION_DAYS)
+    check_in_date_id = year_start_id + rng.integers(0, check_in_offset_range + 1, size=n)
+    check_out_date_id = np.minimum(check_in_date_id + draw_nights(rng, n), year_end_id)
+
+    platform_id = rng.choice(context['platform_ids'], size=n) # Random platform for guaranteed bookings
+    tenant_id = rng.integers(1, context['num_tenants'] + 1, size=n) # Initial tenant
+    nights = check_out_date_id - check_in_date_id
+    revenue = np.round(nights * (AVG_ADR * rng.uniform(0.8, 1.2, size=n)), 2)
+    damage_flag, damage_cost, turnover_flag = draw_damage_and_turnover(rng, n)
+    purpose_of_stay = rng.choice(BOOKING_PURPOSES, size=n)
+
+    keep = nights >= 1 # Only add if still valid
+    return assemble_bookings_frame(
+        context, first_booking_id, property_ids[keep], platform_id[keep], tenant_id[keep],
+        check_in_date_id[keep], check_out_date_id[keep], revenue[keep], purpose_of_stay[keep],
+        damage_flag[keep], damage_cost[keep], turnover_flag[keep]
+    )
+
+class TenantHistory:
+    """Past guests of one shard's bookings, updated a batch at a time in booking order."""
+
+    def __init__(self, num_properties):
+        self.recent = np.zeros(0, dtype=np.int64)
+        self.property_guests = np.zeros((num_properties, PROPERTY_GUEST_MEMORY), dtype=np.int64)
+        self.property_stays = np.zeros(num_properties, dtype=np.int64)
+
+    def record(self, row, tenant_id):
+        """Add a batch of bookings (property rows and their tenants) to both buffers."""
+        self.recent = np.concatenate([self.recent, tenant_id])[-RECENT_TENANT_WINDOW:]
+        # Rank each booking among its property's bookings in the batch; only the last
+        # PROPERTY_GUEST_MEMORY per property are written, so no ring slot is written twice
+        order = np.argsort(row, kind='stable')
+        sorted_row = row[order]
+        rank = np.arange(len(row)) - np.searchsorted(sorted_row, sorted_row)
+        stays_in_batch = np.bincount(row, minlength=len(self.property_stays))
+        keep = rank >= stays_in_batch[sorted_row] - PROPERTY_GUEST_MEMORY
+        slot = (self.property_stays[sorted_row] + rank) % PROPERTY_GUEST_MEMORY
+        self.property_guests[sorted_row[keep], slot[keep]] = tenant_id[order][keep]
+        self.property_stays += stays_in_batch
+
+    def assign_repeats(self, rng, row, tenant_id, repeat_prob, first_booking_id):
+        """Swap in returning guests for a batch of bookings, record the batch and return its tenant ids.
+
+        A booking rolling under its repeat_prob returns. SAME_PROPERTY_REPEAT_SHARE of those
+        rebook a past guest of the same property, as the ring stood before the batch; the rest
+        copy the tenant of one of the RECENT_TENANT_WINDOW bookings before them. A copied
+        booking may itself be a repeat, so sources are resolved by pointer jumping instead of
+        walking the batch row by row.
+        """
+        history_len = len(self.recent)
+        tenants = np.concatenate([self.recent, tenant_id])
+        source = np.arange(len(tenants))
+
+        position = history_len + np.arange(len(tenant_id))
+        window = np.minimum(RECENT_TENANT_WINDOW, position)
+        booking_id = first_booking_id + np.arange(len(tenant_id))
+        repeat = (rng.random(len(tenant_id)) < repeat_prob) & (booking_id > MIN_BOOKINGS_BEFORE_REPEATS) & (window > 0)
+        same_property = repeat & (rng.random(len(tenant_id)) < SAME_PROPERTY_REPEAT_SHARE) & (self.property_stays[row] > 0)
+        returning_row = row[same_property]
+        remembered = np.minimum(self.property_stays[returning_row], PROPERTY_GUEST_MEMORY)
+        tenants[position[same_property]] = self.property_guests[
+            returning_row, (rng.random(len(returning_row)) * remembered).astype(np.int64)]
+
+        anywhere = repeat & ~same_property
+        source[position[anywhere]] = position[anywhere] - 1 - (rng.random(anywhere.sum()) * window[anywhere]).astype(np.int64)
+        while True:
+            jumped = source[source]
+            if np.array_equal(jumped, source):
+                break
+            source = jumped
+
+        tenants = tenants[source][history_len:]
+        self.record(row, tenants)
+        return tenants
+
+def running_total_before(sorted_group, values):
+    """For values sorted by group, the sum of the earlier values in the same group."""
+    running = np.cumsum(values)
+    group_start = np.searchsorted(sorted_group, sorted_group)
+    return running - values - np.concatenate([[0], running])[group_start]
+
+def fit_within(group, nights, capacity):
+    """Trim stays so no group books more than capacity[group] nights.
+
+    Stays are taken in their given order within each group; the stay that crosses the
+    capacity is shortened to fill it and any after it get 0 nights.
+    """
+    order = np.argsort(group, kind='stable')
+    sorted_group = group[order]
+    fitted = np.empty_like(nights)
+    fitted[order] = np.clip(capacity[sorted_group] - running_total_before(sorted_group, nights[order]), 0, nights[order])
+    return fitted
+
+def subtract_stays(gaps, row, check_in_date_id, check_out_date_id):
+    """Remove stays from the free gaps that hold them, returning the new (row, start, end) gaps.
+
+    The stays must fall inside the gaps and not overlap. Gap starts (old starts and every
+    check-out) and gap ends (every check-in and old ends) are each sorted by property and date,
+    so the i-th start pairs with the i-th end. Empty gaps are dropped and the result stays sorted.
+    """
+    gap_row, gap_start, gap_end = gaps
+    start_row, start = np.concatenate([gap_row, row]), np.concatenate([gap_start, check_out_date_id])
+    end_row, end = np.concatenate([row, gap_row]), np.concatenate([check_in_date_id, gap_end])
+    start_order = np.lexsort((start, start_row))
+    end_order = np.lexsort((end, end_row))
+    new_row, new_start, new_end = start_row[start_order], start[start_order], end[end_order]
+    free = new_end > new_start
+    return new_row[free], new_start[free], new_end[free]
+
+def place_stays(rng, gaps, remaining_nights):
+    """Place one round of stays in the free gaps, returning (row, check_in, check_out) and the new gaps.
+
+    Each property with nights left draws enough stays to cover them. A stay lands in a gap with
+    probability proportional to the gap's free nights, and the stays that share a gap are laid out
+    in random order with the gap's spare nights split randomly around them. Stays are trimmed to
+    the property's remaining nights and to the gap; whatever is trimmed is left for the next round.
+    """
+    gap_row, gap_start, gap_end = gaps
+    gap_length = gap_end - gap_start
+    num_properties = len(remaining_nights)
+
+    # A property's gaps laid end to end: a uniform pick over their free nights selects a gap by length
+    free_end = np.cumsum(gap_length)
+    free_offsets = np.concatenate([[0], free_end])
+    row_free_start = free_offsets[np.searchsorted(gap_row, np.arange(num_properties))]
+    row_free_nights = free_offsets[np.searchsorted(gap_row, np.arange(num_properties), side='right')] - row_free_start
+    stays_needed = np.where(row_free_nights > 0, -(-np.maximum(remaining_nights, 0) // AVG_BOOKING_DURATION_DAYS), 0)
+    row = np.repeat(np.arange(num_properties), stays_needed)
+    position = row_free_start[row] + (rng.random(len(row)) * row_free_nights[row]).astype(np.int64)
+    gap = np.searchsorted(free_end, position, side='right')
+
+    nights = fit_within(row, draw_nights(rng, len(row)), remaining_nights)
+    nights = fit_within(gap, nights, gap_length)
+    keep = nights > 0
+    row, gap, nights = row[keep], gap[keep], nights[keep]
+
+    # Spare nights in each gap go before, between and after its stays
+    spare = gap_length - np.bincount(gap, weights=nights, minlength=len(gap_length)).astype(np.int64)
+    lead = (rng.random(len(gap)) * (spare[gap] + 1)).astype(np.int64)
+    order = np.lexsort((lead, gap))
+    row, gap, nights, lead = row[order], gap[order], nights[order], lead[order]
+    check_in = gap_start[gap] + lead + running_total_before(gap, nights)
+    check_out = check_in + nights
+
+    return (row, check_in, check_out), subtract_stays(gaps, row, check_in, check_out)
+
+def generate_random_bookings_chunk(rng, context, stays, first_booking_id, tenant_history):
+    """Phase 2: turn one batch of placed stays into bookings with a platform, tenant and revenue."""
+    row, check_in_date_id, check_out_date_id = stays
+    chunk_size = len(row)
+    property_id = context['property_ids'][row]
+
     # Platform selection with general bias
-    platform_id = np.random.choice(platform_ids_weighted) # Using pre-generated weighted list
-
-    # Tenant selection: some repeat customers
-    tenant_id = np.random.choice(dim_tenant['tenant_id'])
-    if random.random() < TENANT_REPEAT_PROB and booking_id_counter > 100: # Ensure some history before repeating
-        # Pick from already booked tenants to increase repeat customer likelihood
-        recent_tenants = [b['tenant_id'] for b in bookings_data[-500:] if 'tenant_id' in b] # Look at recent bookings
-        if recent_tenants:
-            tenant_id = random.choice(recent_tenants)
-
-    # Ensure check_in and check_out are within the overall date range
-    # Check if total_days_in_period is greater than AVG_BOOKING_DURATION_DAYS to avoid negative range
-    if total_days_in_period - AVG_BOOKING_DURATION_DAYS > 0:
-        check_in_offset = np.random.randint(0, total_days_in_period - AVG_BOOKING_DURATION_DAYS)
-    else:
-        check_in_offset = 0 # Fallback if duration is too long for period
-
-    check_in_date = START_DATE + timedelta(days=check_in_offset)
-    
-    nights = max(1, int(np.random.normal(AVG_BOOKING_DURATION_DAYS, AVG_BOOKING_DURATION_DAYS / 2)))
-    check_out_date = check_in_date + timedelta(days=nights)
-
-    # Convert check_out_date to datetime for comparison with END_DATE_DATETIME
-    if datetime.combine(check_out_date, datetime.min.time()) > END_DATE_DATETIME:
-        check_out_date = END_DATE
-        nights = (check_out_date - check_in_date).days
-        if nights < 1:
-            continue
+    platform_id = rng.choice(context['platform_ids'], size=chunk_size, p=context['platform_probs'])
+    tenant_id = rng.integers(1, context['num_tenants'] + 1, size=chunk_size)
 
-    # Calculate revenue based on property's base price (from dim_property) and ADR variation
-    prop_base_price = dim_property[dim_property['property_id'] == property_id]['base_price'].iloc[0]
     # Revenue is influenced by property's base price, but varies like ADR
-    revenue = round(nights * (prop_base_price * np.random.uniform(0.9, 1.3)), 2) # ADR will fluctuate around base_price
-
-    damage_flag = np.random.choice([0, 1], p=[0.98, 0.02])
-    damage_cost = round(np.random.uniform(50, 500), 2) if damage_flag == 1 else 0
-    turnover_flag = np.random.choice([0, 1], p=[0.75, 0.25])
-
-    # Ensure check_in_date and check_out_date are valid keys in date_to_id_map
-    check_in_date_id = date_to_id_map.get(check_in_date, None)
-    check_out_date_id = date_to_id_map.get(check_out_date, None)
-
-    if check_in_date_id is not None and check_out_date_id is not None:
-        bookings_data.append({
-            'booking_id': booking_id_counter,
-            'property_id': property_id,
-            'platform_id': platform_id,
-            'tenant_id': tenant_id,
-            'check_in_date_id': check_in_date_id, # NEW: Add check_in_date_id
-            'check_out_date_id': check_out_date_id, # NEW: Add check_out_date_id
-            'check_in': check_in_date.strftime('%Y-%m-%d'),
-            'check_out': check_out_date.strftime('%Y-%m-%d'),
-            'nights': nights,
-            'revenue': revenue,
-            'purpose_of_stay': np.random.choice(BOOKING_PURPOSES),
-            'damage_flag': damage_flag,
-            'damage_cost': damage_cost,
-            'turnover_flag': turnover_flag
-        })
-        booking_id_counter += 1
-
-fact_bookings = pd.DataFrame(bookings_data)
-fact_bookings = fact_bookings[fact_bookings['nights'] > 0] # Filter out 0-night bookings
-fact_bookings.to_csv(os.path.join(OUTPUT_DIR, 'fact_bookings.csv'), index=False)
-print(f"fact_bookings generated with {len(fact_bookings)} rows.")
-print(f"Total nights generated: {fact_bookings['nights'].sum()}")
-print(f"Total revenue generated: ${fact_bookings['revenue'].sum():,.2f}")
-
-
-print("Generating fact_reviews...")
-# --- 7. Generate fact_reviews ---
-reviews_data = []
-review_id_counter = 1
-# Convert 'check_out' column to datetime objects for proper comparison
-fact_bookings['check_out_dt'] = pd.to_datetime(fact_bookings['check_out'])
-
-# Consider only bookings that have completed (check_out_date < END_DATE)
-# Compare check_out_dt (datetime64[ns]) with END_DATE_DATETIME (datetime object)
-completed_bookings = fact_bookings[fact_bookings['check_out_dt'] < END_DATE_DATETIME].copy()
-
-# Limit the number of reviews to make it realistic (not every booking gets a review)
-NUM_REVIEWS_TO_GENERATE = int(len(completed_bookings) * 0.7) # 70% of completed bookings get a review
-if NUM_REVIEWS_TO_GENERATE > 0:
-    bookings_for_review = completed_bookings.sample(n=NUM_REVIEWS_TO_GENERATE, random_state=42)
-else:
-    bookings_for_review = pd.DataFrame() # Empty if no bookings
-
-for idx, booking_row in bookings_for_review.iterrows():
-    rating = random.choices(
-        list(REVIEW_RATING_DISTRIBUTION.keys()), 
-        weights=list(REVIEW_RATING_DISTRIBUTION.values()), 
-        k=1
-    )[0]
-    
-    comment_pool = REVIEW_COMMENTS[rating]
-    review_text = random.choice(comment_pool)
-    
-    # Review date is after check-out date
-    # Use the datetime object directly from the DataFrame for consistency
-    check_out_dt_val = booking_row['check_out_dt'].date() # Get date part from datetime object
-    review_date = check_out_dt_val + timedelta(days=np.random.randint(1, 15)) # Review within 1-14 days after checkout
-    
-    # Ensure review_date is within the overall data range
-    if datetime.combine(review_date, datetime.min.time()) > END_DATE_DATETIME:
-        review_date = END_DATE
-    
-    # Ensure review_date is a valid key in date_to_id_map
-    review_date_id = date_to_id_map.get(review_date, None)
-
-    if review_date_id is not None:
-        reviews_data.append({
-            'review_id': review_id_counter,
-            'booking_id': booking_row['booking_id'],
-            'tenant_id': booking_row['tenant_id'], # Link to the tenant who made the booking
-            'property_id': booking_row['property_id'], # Also link directly to property for easier analysis
-            'review_date_id': review_date_id, # NEW: Add review_date_id
-            'rating': rating,
-            'review_text': review_text,
-            'review_date': review_date.strftime('%Y-%m-%d')
-        })
-        review_id_counter += 1
+    nights = check_out_date_id - check_in_date_id
+    prop_base_price = context['base_price_by_property'][property_id]
+    revenue = np.round(nights * (prop_base_price * rng.uniform(0.9, 1.3, size=chunk_size)), 2)
+    damage_flag, damage_cost, turnover_flag = draw_damage_and_turnover(rng, chunk_size)
+    purpose_index = rng.integers(len(BOOKING_PURPOSES), size=chunk_size)
+    purpose_of_stay = np.array(BOOKING_PURPOSES)[purpose_index]
+
+    repeat_prob = np.array([TENANT_REPEAT_PROB_BY_PURPOSE.get(purpose, TENANT_REPEAT_PROB) for purpose in BOOKING_PURPOSES])
+    tenant_id = tenant_history.assign_repeats(rng, row, tenant_id, repeat_prob[purpose_index], first_booking_id)
+    return assemble_bookings_frame(
+        context, first_booking_id, property_id, platform_id, tenant_id,
+        check_in_date_id, check_out_date_id, revenue, purpose_of_stay,
+        damage_flag, damage_cost, turnover_flag
+    )
+
+def iter_booking_chunks(rng, context):
+    """Yield (phase, chunk) pairs of fact_bookings: one Phase 1 batch per year, then Phase 2 batches of up to BOOKING_CHUNK_SIZE.
+
+    phase is 'phase_1_bookings' or 'phase_2_bookings'. booking_id continues across chunks,
+    so writing the chunks in order gives monotonic ids.
+    """
+    booking_id_counter = 1
+    date_strings = context['date_strings']
+    origin_date = date.fromisoformat(date_strings[0])
+    window_start = date.fromisoformat(date_strings[context['window_start_id']])
+    window_end = date.fromisoformat(date_strings[context['window_end_id']])
+    first_night_id, window_end_id = context['first_night_id'], context['window_end_id']
+
+    # --- Phase 1: Guaranteed Bookings for Each Property across All Years ---
+    # This ensures every property has data in every year. When extending an existing
+    # dataset, the year the window starts in already has its guaranteed bookings.
+    tenant_history = TenantHistory(len(context['property_ids']))
+    phase_one_chunks = []
+    for year in range(window_start.year, window_end.year + 1):
+        if date(year, 1, 1) < window_start and window_start > origin_date:
+            continue
+        year_start = max(window_start, date(year, 1, 1))
+        year_end = min(window_end, date(year, 12, 31))
+
+        if year_end >= year_start: # Ensure year has days in the range
+            chunk = generate_guaranteed_bookings(
+                rng, context, (year_start - origin_date).days, (year_end - origin_date).days, booking_id_counter
+            )
+            tenant_history.record(np.searchsorted(context['property_ids'], chunk['property_id'].to_numpy()),
+                                  chunk['tenant_id'].to_numpy())
+            booking_id_counter += len(chunk)
+            phase_one_chunks.append(chunk)
+            yield 'phase_1_bookings', chunk
+
+    # --- Phase 2: Generate Remaining Bookings to hit Target Occupancy with Variances ---
+    # Every property is filled towards its own target occupancy of the window's nights, drawn
+    # around its type's target so properties of a type differ while the type average holds.
+    # Stays go only into free gaps, so the target is met in booked nights without overlaps.
+    # The target covers the look-around nights too, so clipping leaves the window at the same rate.
+    property_id, check_in_date_id, check_out_date_id = (
+        np.concatenate([np.zeros(0, dtype=np.int64)] + [chunk[column].to_numpy() for chunk in phase_one_chunks])
+        for column in ('property_id', 'check_in_date_id', 'check_out_date_id')
+    )
+    num_properties = len(context['property_ids'])
+    row = np.searchsorted(context['property_ids'], property_id)
+    window_gaps = (np.arange(num_properties),
+                   np.full(num_properties, first_night_id - STAY_LOOKAROUND_NIGHTS),
+                   np.full(num_properties, window_end_id + STAY_LOOKAROUND_NIGHTS))
+    nights_placed = window_end_id - first_night_id + 2 * STAY_LOOKAROUND_NIGHTS
+    gaps = subtract_stays(window_gaps, row, check_in_date_id, check_out_date_id)
+    booked_nights = np.bincount(row, weights=check_out_date_id - check_in_date_id, minlength=num_properties)
+    target_occupancy = draw_property_targets(rng, context['target_occupancy'])
+    remaining_nights = (np.round(target_occupancy * nights_placed) - booked_nights).astype(np.int64)
+
+    # Each round fills most of what is left; stays are shuffled so booking_id order is not by property.
+    # Returning guests are drawn from the history the guaranteed bookings started
+    while True:
+        stays, gaps = place_stays(rng, gaps, remaining_nights)
+        if not len(stays[0]):
+            break
+        remaining_nights -= np.bincount(stays[0], weights=stays[2] - stays[1], minlength=num_properties).astype(np.int64)
+        row, check_in_date_id, check_out_date_id = stays
+        check_in_date_id = np.maximum(check_in_date_id, first_night_id)
+        check_out_date_id = np.minimum(check_out_date_id, window_end_id)
+        inside = check_out_date_id > check_in_date_id
+        stays = (row[inside], check_in_date_id[inside], check_out_date_id[inside])
+        shuffled = rng.permutation(len(stays[0]))
+        for chunk_start in range(0, len(shuffled), BOOKING_CHUNK_SIZE):
+            chunk_stays = tuple(column[shuffled[chunk_start:chunk_start + BOOKING_CHUNK_SIZE]] for column in stays)
+            chunk = generate_random_bookings_chunk(rng, context, chunk_stays, booking_id_counter, tenant_history)
+            booking_id_counter += len(chunk)
+            yield 'phase_2_bookings', chunk
+
+
+# --- 7. fact_reviews Configuration ---
+REVIEW_COLUMNS = ['review_id', 'booking_id', 'tenant_id', 'property_id', 'review_date_id', 'rating', 'review_text', 'review_date']
+REVIEW_SHARE_OF_COMPLETED = 0.7 # 70% of completed bookings get a review
+REVIEW_DELAY_DAYS = 14 # Reviews are written 1 to this many days after check-out
+
+def draw_ratings_and_comments(rng, size):
+    """Ratings from REVIEW_RATING_DISTRIBUTION and a comment for each from REVIEW_COMMENTS."""
+    rating_values = np.array(list(REVIEW_RATING_DISTRIBUTION.keys()))
+    rating_probs = np.array(list(REVIEW_RATING_DISTRIBUTION.values()))
+    rating_probs = rating_probs / rating_probs.sum()
+    # Comments for every rating laid out contiguously, so a (rating, rank) pair indexes them directly
+    comment_counts = np.array([len(REVIEW_COMMENTS[rating]) for rating in rating_values])
+    comment_offsets = np.concatenate([[0], np.cumsum(comment_counts)[:-1]])
+    comments = np.array([comment for rating in rating_values for comment in REVIEW_COMMENTS[rating]], dtype=object)
+
+    rating_idx = rng.choice(len(rating_values), size=size, p=rating_probs)
+    comment_rank = (rng.random(size) * comment_counts[rating_idx]).astype(np.int64)
+    return rating_values[rating_idx], comments[comment_offsets[rating_idx] + comment_rank]
+
+def generate_reviews_for_chunk(rng, context, bookings_chunk, first_review_id):
+    """Build fact_reviews rows for one chunk of bookings, numbering them from first_review_id.
+
+    Ratings, comments and review dates are drawn for all sampled bookings at once.
+    """
+    window_end_id = context['window_end_id']
+
+    # Every booking has checked out by the last date in the range.
+    # Limit the number of reviews to make it realistic (not every booking gets a review)
+    num_reviews_to_generate = int(len(bookings_chunk) * REVIEW_SHARE_OF_COMPLETED)
+    bookings_for_review = bookings_chunk.sample(n=num_reviews_to_generate, random_state=rng)
+
+    rating, review_text = draw_ratings_and_comments(rng, num_reviews_to_generate)
+
+    # Review within 1-14 days after checkout; reviews due after the last date are left to the
+    # window that extends the dataset (see draw_pending_reviews)
+    review_date_id = bookings_for_review['check_out_date_id'].to_numpy() + rng.integers(1, REVIEW_DELAY_DAYS + 1, size=num_reviews_to_generate)
+    written = review_date_id <= window_end_id
+    bookings_for_review, rating, review_text, review_date_id = (
+        bookings_for_review[written], rating[written], review_text[written], review_date_id[written])
+    num_reviews_to_generate = len(review_date_id)
+
+    return pd.DataFrame({
+        'review_id': np.arange(first_review_id, first_review_id + num_reviews_to_generate),
+        'booking_id': bookings_for_review['booking_id'].to_numpy(),
+        'tenant_id': bookings_for_review['tenant_id'].to_numpy(), # Link to the tenant who made the booking
+        'property_id': bookings_for_review['property_id'].to_numpy(), # Also link directly to property for easier analysis
+        'review_date_id': review_date_id,
+        'rating': rating,
+        'review_text': review_text,
+        'review_date': context['date_strings'][review_date_id]
+    }, columns=REVIEW_COLUMNS)
+
+def draw_pending_reviews(rng, date_strings, bookings, previous_end_id, window_end_id, first_review_id):
+    """Reviews that fall in a new window for bookings written before it.
+
+    bookings are the earlier bookings without a review that checked out within
+    REVIEW_DELAY_DAYS of previous_end_id. Each is reviewed with the chance that its review
+    date lands in the new window given that it was not written by previous_end_id, so a
+    dataset extended in steps gets the same share and delays as one generated at once.
+    """
+    days_before = previous_end_id - bookings['check_out_date_id'].to_numpy() # Delays already ruled out
+    days_until = np.minimum(window_end_id - bookings['check_out_date_id'].to_numpy(), REVIEW_DELAY_DAYS)
+    share = REVIEW_SHARE_OF_COMPLETED / REVIEW_DELAY_DAYS
+    chance = share * (days_until - days_before) / (1 - share * days_before)
+    reviewed = rng.random(len(bookings)) < chance
+    bookings, days_before, days_until = bookings[reviewed], days_before[reviewed], days_until[reviewed]
+    num_reviews = len(bookings)
+
+    rating, review_text = draw_ratings_and_comments(rng, num_reviews)
+    review_date_id = bookings['check_out_date_id'].to_numpy() + days_before + 1 + (rng.random(num_reviews) * (days_until - days_before)).astype(np.int64)
+    return pd.DataFrame({
+        'review_id': np.arange(first_review_id, first_review_id + num_reviews),
+        'booking_id': bookings['booking_id'].to_numpy(),
+        'tenant_id': bookings['tenant_id'].to_numpy(),
+        'property_id': bookings['property_id'].to_numpy(),
+        'review_date_id': review_date_id,
+        'rating': rating,
+        'review_text': review_text,
+        'review_date': date_strings[review_date_id]
+    }, columns=REVIEW_COLUMNS)
+
+
+# --- 8. Generate fact_property_daily (one row per property per date) ---
+PROPERTY_DAILY_COLUMNS = ['property_id', 'date_id', 'date', 'occupied', 'nightly_revenue', 'booking_id']
+PROPERTY_DAILY_OUTPUT = True # Also write fact_property_daily; it has properties x days rows
+
+def build_property_daily(context, bookings):
+    """Expand bookings into nightly occupancy for every property and night in the context's window.
+
+    The nights run from first_night_id to the day before the last date, which is a check-out
+    day only; the window that extends the dataset writes its night.
+    A stay occupies the nights check_in_date_id .. check_out_date_id - 1. Each booking adds +1 at
+    its check-in and -1 at its check-out in a (property, day) difference array, and a cumulative
+    sum along the days turns that into the number of stays covering each night. The nightly rate
+    (revenue / nights) and the booking_id are expanded the same way. Stays are placed without
+    overlaps, so every occupied night carries its booking_id; a night covered by more than
+    one stay would be left empty.
+    """
+    property_ids = np.sort(context['property_ids'])
+    first_night_id, window_end_id = context['first_night_id'], context['window_end_id']
+    num_days = window_end_id - first_night_id
+    # One extra column per property takes the check-outs on the last date
+    num_cells = len(property_ids) * (num_days + 1)
+
+    row = np.searchsorted(property_ids, bookings['property_id'].to_numpy())
+    check_in_cell = row * (num_days + 1) + (bookings['check_in_date_id'].to_numpy() - first_night_id)
+    check_out_cell = row * (num_days + 1) + (bookings['check_out_date_id'].to_numpy() - first_night_id)
+    nightly_rate = bookings['revenue'].to_numpy() / bookings['nights'].to_numpy()
+    booking_id = bookings['booking_id'].to_numpy().astype(np.float64)
+
+    def expand(weights=None):
+        starts = np.bincount(check_in_cell, weights=weights, minlength=num_cells)
+        ends = np.bincount(check_out_cell, weights=weights, minlength=num_cells)
+        return (starts - ends).reshape(len(property_ids), num_days + 1).cumsum(axis=1)[:, :num_days].ravel()
+
+    stays = np.rint(expand()).astype(np.int64)
+    nightly_revenue = np.round(expand(nightly_rate), 2)
+    nightly_booking_id = pd.array(np.rint(expand(booking_id)).astype(np.int64), dtype='Int64')
+    nightly_booking_id[stays != 1] = pd.NA
+
+    date_id = np.tile(np.arange(first_night_id, window_end_id), len(property_ids))
+    return pd.DataFrame({
+        'property_id': np.repeat(property_ids, num_days),
+        'date_id': date_id,
+        'date': context['date_strings'][date_id],
+        'occupied': (stays > 0).astype(np.int8),
+        'nightly_revenue': np.where(stays > 0, nightly_revenue, 0.0),
+        'booking_id': nightly_booking_id
+    })
+
+
+def plan_shards(dim_property, dim_platform, dim_tenant, dim_date, booking_seed, review_seed, window_start_id=None,
+                with_property_daily=PROPERTY_DAILY_OUTPUT, profile_settings=None):
+    """Split dim_property into SHARD_SIZE slices, each with its own booking context and derived seeds.
+
+    Bookings and reviews draw from separate seeds, so review settings can change without
+    changing the bookings. profile_settings (StageProfiler.settings()) tells each shard
+    how to profile its stages.
+    """
+    num_shards = max(1, -(-len(dim_property) // SHARD_SIZE))
+    booking_seeds = booking_seed.spawn(num_shards)
+    review_seeds = review_seed.spawn(num_shards)
+    return [
+        (shard_index,
+         booking_seeds[shard_index],
+         review_seeds[shard_index],
+         build_booking_context(dim_property.iloc[shard_index * SHARD_SIZE:(shard_index + 1) * SHARD_SIZE],
+                               dim_platform, dim_tenant, dim_date, window_start_id),
+         with_property_daily,
+         profile_settings or {})
+        for shard_index in range(num_shards)
+    ]
+
+def generate_shard_bookings(shard_task, profiler=None):
+    """Phase 1 and Phase 2 bookings for one shard, numbered locally from 1."""
+    shard_index, booking_seed, _, context, _, profile_settings = shard_task
+    profiler = profiler or StageProfiler(prefix=f'shard{shard_index:04d}.', **profile_settings)
+    rng, _, _ = make_random_sources(booking_seed)
+    bookings_chunks = []
+    booking_chunks = iter_booking_chunks(rng, context)
+    while True:
+        # Each chunk is timed as it is drawn, under the phase that produced it
+        token = profiler.start()
+        phase, bookings_chunk = next(booking_chunks, (None, None))
+        if phase is None:
+            break
+        profiler.stop(phase, token, len(bookings_chunk))
+        bookings_chunks.append(bookings_chunk)
+    if not bookings_chunks:
+        # Typed like a drawn chunk, so reviews and daily occupancy can index with its columns
+        no_ids, no_amounts = np.zeros(0, dtype=np.int64), np.zeros(0)
+        return assemble_bookings_frame(context, 1, no_ids, no_ids, no_ids, no_ids, no_ids, no_amounts,
+                                       np.zeros(0, dtype=object), no_ids, no_amounts, no_ids)
+    return pd.concat(bookings_chunks, ignore_index=True)
+
+def generate_shard_reviews(shard_task, shard_bookings, profiler=None):
+    """fact_reviews for one shard's bookings, numbered locally from 1."""
+    shard_index, _, review_seed, context, _, profile_settings = shard_task
+    profiler = profiler or StageProfiler(prefix=f'shard{shard_index:04d}.', **profile_settings)
+    rng, _, _ = make_random_sources(review_seed)
+    with profiler.stage('fact_reviews') as stage:
+        shard_reviews = generate_reviews_for_chunk(rng, context, shard_bookings, 1)
+        stage['rows'] = len(shard_reviews)
+    return shard_reviews
+
+def generate_shard(shard_task):
+    """Bookings, reviews and daily occupancy for one shard, numbered locally from 1.
+
+    Runs in a pool worker, so it only depends on its task and module-level configuration.
+    Also returns the shard's stage measurements for the parent's profiler.
+    """
+    shard_index, _, _, context, with_property_daily, profile_settings = shard_task
+    profiler = StageProfiler(prefix=f'shard{shard_index:04d}.', **profile_settings)
+    shard_bookings = generate_shard_bookings(shard_task, profiler)
+    shard_reviews = generate_shard_reviews(shard_task, shard_bookings, profiler)
+    shard_daily = None
+    if with_property_daily:
+        with profiler.stage('fact_property_daily') as stage:
+            shard_daily = build_property_daily(context, shard_bookings)
+            stage['rows'] = len(shard_daily)
+    profiler.dump_profiles()
+    return shard_bookings, shard_reviews, shard_daily, profiler.stages
+
+def iter_shard_results(shard_tasks, num_workers, worker=generate_shard):
+    """Yield worker(task) for every shard in shard order, in this process or across a worker pool."""
+    if num_workers <= 1 or len(shard_tasks) <= 1:
+        yield from map(worker, shard_tasks)
+        return
+    with Pool(processes=num_workers) as pool:
+        yield from pool.imap(worker, shard_tasks)
+
+
+def open_fact_writers(output_dir, output_format, with_property_daily, append=False):
+    """Writers for the fact tables a shard produces, by table name."""
+    tables = [('fact_bookings', BOOKING_COLUMNS), ('fact_reviews', REVIEW_COLUMNS)]
+    if with_property_daily:
+        tables.append(('fact_property_daily', PROPERTY_DAILY_COLUMNS))
+    return {table_name: open_table_writer(output_dir, table_name, columns, output_format, stream=STREAM_OUTPUT, append=append)
+            for table_name, columns in tables}
+
+def write_shard(shard_task, writers, booking_id_offset, review_id_offset, profiler):
+    """Generate one shard, shift its local ids onto the global sequences and write it; returns its totals."""
+    shard_bookings, shard_reviews, shard_daily, shard_stages = generate_shard(shard_task)
+    profiler.merge(shard_stages)
+    shard_bookings['booking_id'] += booking_id_offset
+    shard_reviews['booking_id'] += booking_id_offset
+    shard_reviews['review_id'] += review_id_offset
+    if shard_daily is not None:
+        shard_daily['booking_id'] += booking_id_offset
+
+    shard_tables = {'fact_bookings': shard_bookings, 'fact_reviews': shard_reviews, 'fact_property_daily': shard_daily}
+    for table_name, writer in writers.items():
+        with profiler.stage(f'write_{table_name}', rows=len(shard_tables[table_name])):
+            writer.write(shard_tables[table_name])
+    return {'rows': {table_name: len(shard_tables[table_name]) for table_name in writers},
+            'nights': int(shard_bookings['nights'].sum()), 'revenue': float(shard_bookings['revenue'].sum())}
+
+def count_shard_rows(shard_task):
+    """The bookings and reviews a shard generates, without keeping or writing them."""
+    shard_bookings = generate_shard_bookings(shard_task, StageProfiler())
+    return len(shard_bookings), len(generate_shard_reviews(shard_task, shard_bookings, StageProfiler()))
+
+def write_shard_parts(part_task):
+    """Pool worker: write one shard's fact tables to its own files under part_dir.
+
+    Returns the shard's totals and stage measurements; only these go back to the parent,
+    so its memory does not grow with the shards finished ahead of the merge.
+    """
+    shard_task, part_dir, output_format, booking_id_offset, review_id_offset = part_task
+    shard_index, _, _, _, with_property_daily, profile_settings = shard_task
+    profiler = StageProfiler(prefix=f'shard{shard_index:04d}.', **profile_settings)
+    os.makedirs(part_dir, exist_ok=True)
+    writers = open_fact_writers(part_dir, output_format, with_property_daily)
+    totals = write_shard(shard_task, writers, booking_id_offset, review_id_offset, profiler)
+    for table_name, writer in writers.items():
+        with profiler.stage(f'write_{table_name}'):
+            writer.close()
+    profiler.dump_profiles()
+    return totals, profiler.stages
+
+def write_fact_tables(shard_tasks, num_workers, output_format, append=False, booking_id_offset=0, review_id_offset=0,
+                      pending_reviews=None, profiler=None):
+    """Run every shard and write the fact tables, returning their writers.
+
+    Shards are written in shard order; their local ids are shifted onto the global
+    sequences, which start after booking_id_offset and review_id_offset. With one worker
+    every shard is written straight to the tables. With more, each worker writes its
+    shard to part files under SHARD_PARTS_DIR and the parent appends them in order. A
+    shard's ids depend on the row counts of the shards before it, so a first pass
+    generates only the bookings and reviews to count them. pending_reviews, reviews of
+    earlier bookings numbered from review_id_offset + 1, are written before the shards.
+    """
+    profiler = profiler or StageProfiler()
+    writers = open_fact_writers(OUTPUT_DIR, output_format, any(task[4] for task in shard_tasks), append=append)
+    totals = {'nights': 0, 'revenue': 0.0}
+    if pending_reviews is not None:
+        with profiler.stage('write_fact_reviews', rows=len(pending_reviews)):
+            writers['fact_reviews'].write(pending_reviews)
+
+    if num_workers <= 1 or len(shard_tasks) <= 1:
+        for shard_task in shard_tasks:
+            shard_totals = write_shard(shard_task, writers, booking_id_offset + writers['fact_bookings'].rows_written,
+                                       review_id_offset + writers['fact_reviews'].rows_written, profiler)
+            totals['nights'] += shard_totals['nights']
+            totals['revenue'] += shard_totals['revenue']
+    else:
+        with profiler.stage('count_shard_rows') as stage:
+            row_counts = np.array(list(iter_shard_results(shard_tasks, num_workers, count_shard_rows)), dtype=np.int64)
+            stage['rows'] = int(row_counts.sum())
+        first_ids = np.cumsum(row_counts, axis=0) - row_counts + [booking_id_offset + writers['fact_bookings'].rows_written,
+                                                                  review_id_offset + writers['fact_reviews'].rows_written]
+        parts_dir = os.path.join(OUTPUT_DIR, SHARD_PARTS_DIR)
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        part_tasks = [(shard_task, os.path.join(parts_dir, f'shard{shard_task[0]:04d}'), output_format,
+                       int(first_ids[position, 0]), int(first_ids[position, 1]))
+                      for position, shard_task in enumerate(shard_tasks)]
+        for part_task, (shard_totals, shard_stages) in zip(part_tasks, iter_shard_results(part_tasks, num_workers, write_shard_parts)):
+            profiler.merge(shard_stages)
+            part_dir = part_task[1]
+            for table_name, writer in writers.items():
+                with profiler.stage(f'merge_{table_name}', rows=shard_totals['rows'][table_name]):
+                    writer.merge_part(part_dir, shard_totals['rows'][table_name])
+            shutil.rmtree(part_dir)
+            totals['nights'] += shard_totals['nights']
+            totals['revenue'] += shard_totals['revenue']
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    for table_name, writer in writers.items():
+        with profiler.stage(f'write_{table_name}'):
+            writer.close()
+    print(f"fact_bookings generated with {writers['fact_bookings'].rows_written} rows.")
+    print(f"Total nights generated: {totals['nights']}")
+    print(f"Total revenue generated: ${totals['revenue']:,.2f}")
+    print(f"fact_reviews generated with {writers['fact_reviews'].rows_written} rows.")
+    if 'fact_property_daily' in writers:
+        print(f"fact_property_daily generated with {writers['fact_property_daily'].rows_written} rows.")
+    return writers['fact_bookings'], writers['fact_reviews']
+
+
+def generate_dataset(seed, num_workers, output_format, with_property_daily=PROPERTY_DAILY_OUTPUT, profiler=None):
+    """Generate every table from START_DATE to END_DATE, replacing what is in OUTPUT_DIR."""
+    profiler = profiler or StageProfiler()
+    root_seed, stage_seeds = derive_stage_seeds(seed)
+    print(f"Starting V2 data generation with seed {root_seed.entropy}...")
+
+    def build_dimension(table_name, generate):
+        print(f"Generating {table_name}...")
+        with profiler.stage(table_name) as stage:
+            table = generate()
+            stage['rows'] = len(table)
+        with profiler.stage(f'write_{table_name}', rows=len(table)):
+            write_table(table, OUTPUT_DIR, table_name, output_format)
+        print(f"{table_name} generated with {len(table)} rows.")
+        return table
+
+    dim_date = build_dimension('dim_date', generate_dim_date)
+    owner_rng, _, owner_fake = make_random_sources(stage_seeds['dim_owner'])
+    dim_owner = build_dimension('dim_owner', lambda: generate_dim_owner(owner_rng, owner_fake))
+    dim_platform = build_dimension('dim_platform', generate_dim_platform)
+    build_dimension('dim_amenity', generate_dim_amenity)
+    property_rng, property_random, property_fake = make_random_sources(stage_seeds['dim_property'])
+    dim_property = build_dimension('dim_property', lambda: generate_dim_property(dim_owner, property_rng, property_random, property_fake))
+    build_dimension('property_amenity', lambda: generate_property_amenity(dim_property))
+    tenant_rng, _, tenant_fake = make_random_sources(stage_seeds['dim_tenant'])
+    dim_tenant = build_dimension('dim_tenant', lambda: generate_dim_tenant(tenant_rng, tenant_fake))
+
+    print("Generating fact_bookings and fact_reviews...")
+    shard_tasks = plan_shards(dim_property, dim_platform, dim_tenant, dim_date, stage_seeds['facts'], stage_seeds['fact_reviews'],
+                              with_property_daily=with_property_daily, profile_settings=profiler.settings())
+    print(f"Generating {len(shard_tasks)} shard(s) of up to {SHARD_SIZE} properties on {num_workers} worker(s).")
+    write_fact_tables(shard_tasks, num_workers, output_format, profiler=profiler)
+    return root_seed
+
+
+def extend_dataset(new_end_date, seed, num_workers, output_format, with_property_daily=PROPERTY_DAILY_OUTPUT, profiler=None):
+    """Roll an existing dataset in OUTPUT_DIR forward to new_end_date.
+
+    dim_date is extended from its last date_id, and only bookings and reviews for the
+    new window are generated and appended, with ids continuing from the current
+    maxima. Owners, properties, platforms and tenants are read back unchanged.
+    """
+    profiler = profiler or StageProfiler()
+    if not os.path.exists(table_path(OUTPUT_DIR, 'dim_date', output_format)):
+        raise FileNotFoundError(f"No {output_format} dataset in '{OUTPUT_DIR}' to extend; run a full generation first")
+
+    dim_date = read_table(OUTPUT_DIR, 'dim_date', output_format).sort_values('date_id', ignore_index=True)
+    origin_date = date.fromisoformat(dim_date['date'].iloc[0])
+    last_date = date.fromisoformat(dim_date['date'].iloc[-1])
+    if new_end_date <= last_date:
+        print(f"Dataset already runs to {last_date}; nothing to extend.")
+        return
+
+    root_seed = np.random.SeedSequence(seed)
+    window_start_id = int(dim_date['date_id'].iloc[-1]) + 1
+    print(f"Extending V2 data from {last_date} to {new_end_date} with seed {root_seed.entropy}...")
+
+    with profiler.stage('dim_date') as stage:
+        new_dates = generate_dim_date(last_date + timedelta(days=1), new_end_date, origin_date)
+        new_dates['date'] = new_dates['date'].astype(str)
+        stage['rows'] = len(new_dates)
+    dim_date = pd.concat([dim_date, new_dates], ignore_index=True)
+
+    dim_platform = read_table(OUTPUT_DIR, 'dim_platform', output_format)
+    dim_property = read_table(OUTPUT_DIR, 'dim_property', output_format)
+    dim_tenant = read_table(OUTPUT_DIR, 'dim_tenant', output_format)
+    bookings = read_table(OUTPUT_DIR, 'fact_bookings', output_format,
+                          columns=['booking_id', 'tenant_id', 'property_id', 'check_out_date_id'])
+    reviews = read_table(OUTPUT_DIR, 'fact_reviews', output_format, columns=['review_id', 'booking_id'])
+    max_booking_id = 0 if bookings.empty else int(bookings['booking_id'].max())
+    max_review_id = 0 if reviews.empty else int(reviews['review_id'].max())
+
+    # Bookings that checked out shortly before the old last date may still be reviewed in the new window
+    previous_end_id = window_start_id - 1
+    with profiler.stage('pending_reviews') as stage:
+        awaiting_review = bookings[(bookings['check_out_date_id'] > previous_end_id - REVIEW_DELAY_DAYS)
+                                   & ~bookings['booking_id'].isin(reviews['booking_id'])]
+        review_rng, _, _ = make_random_sources(derive_window_seed(root_seed, window_start_id, 'pending_reviews'))
+        pending_reviews = draw_pending_reviews(review_rng, dim_date.sort_values('date_id')['date'].astype(str).to_numpy(),
+                                               awaiting_review, previous_end_id, len(dim_date) - 1, max_review_id + 1)
+        stage['rows'] = len(pending_reviews)
+    del bookings, reviews
+
+    print("Generating fact_bookings and fact_reviews for the new window...")
+    shard_tasks = plan_shards(dim_property, dim_platform, dim_tenant, dim_date,
+                              derive_window_seed(root_seed, window_start_id),
+                              derive_window_seed(root_seed, window_start_id, 'fact_reviews'), window_start_id,
+                              with_property_daily and os.path.exists(table_path(OUTPUT_DIR, 'fact_property_daily', output_format)),
+                              profiler.settings())
+    write_fact_tables(shard_tasks, num_workers, output_format, append=True,
+                      booking_id_offset=max_booking_id, review_id_offset=max_review_id,
+                      pending_reviews=pending_reviews, profiler=profiler)
+
+    # dim_date is saved last: if fact generation fails, the next run starts from the same last date
+    with profiler.stage('write_dim_date', rows=len(dim_date)):
+        write_table(dim_date, OUTPUT_DIR, 'dim_date', output_format)
+    print(f"dim_date extended by {len(new_dates)} rows to {len(dim_date)}.")
+    return root_seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the JnJ synthetic booking warehouse as CSV or Parquet files.")
+    parser.add_argument('--workers', type=int, default=NUM_WORKERS, help="Processes used to generate booking shards")
+    parser.add_argument('--seed', type=int, default=SEED, help="Seed for every random source; omit for a fresh run")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default=OUTPUT_FORMAT, help="Output file format")
+    parser.add_argument('--extend-to', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help="Append bookings and reviews up to this date to the existing dataset instead of regenerating it")
+    parser.add_argument('--no-property-daily', dest='property_daily', action='store_false', default=PROPERTY_DAILY_OUTPUT,
+                        help="Skip the property x date fact_property_daily table")
+    parser.add_argument('--profile', metavar='REPORT.json',
+                        help="Write per-stage wall time, CPU time, peak memory and rows/sec to this JSON file")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Also record each stage's peak Python allocations with tracemalloc (slower)")
+    parser.add_argument('--cprofile-dir', metavar='DIR', help="Dump a cProfile .prof file per stage into this folder")
+    parser.add_argument('--validate', action='store_true',
+                        help="Check keys, foreign keys and date rules of the written tables; exit with an error on any violation")
+    args = parser.parse_args()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    profiler = StageProfiler(trace_memory=args.trace_memory, cprofile_dir=args.cprofile_dir)
+    if args.extend_to:
+        root_seed = extend_dataset(args.extend_to, args.seed, args.workers, args.format, args.property_daily, profiler)
+    else:
+        root_seed = generate_dataset(args.seed, args.workers, args.format, args.property_daily, profiler)
+
+    print(f"\nData generation complete! {args.format.upper()} files are in the '{OUTPUT_DIR}' folder.")
+    profiler.dump_profiles()
+    if args.profile:
+        profiler.write_report(
+            args.profile,
+            mode='extend' if args.extend_to else 'generate', seed=None if root_seed is None else root_seed.entropy,
+            workers=args.workers, format=args.format, start_date=str(START_DATE),
+            end_date=str(args.extend_to or END_DATE), num_properties=NUM_PROPERTIES, num_tenants=NUM_TENANTS,
+        )
+        print(f"Profile report written to '{args.profile}'.")
+
+    if args.validate:
+        print("Validating the generated tables...")
+        report = validate_warehouse(OUTPUT_DIR, args.format)
+        print(f"{report['violations']:,} violation(s) found.")
+        if report['violations']:
+            sys.exit(1)
 
-fact_reviews = pd.DataFrame(reviews_data)
-fact_reviews.to_csv(os.path.join(OUTPUT_DIR, 'fact_reviews.csv'), index=False)
-print(f"fact_reviews generated with {len(fact_reviews)} rows.")
 
-print("\nData generation complete! CSV files are in the 'synthetic_booking_data_v2' folder.")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import jnj_script as generator
+
+# --- Stage Cache Configuration ---
+# Every stage's DataFrame is pickled to <cache_dir>/<stage>-<key>.pkl. The key hashes the
+# stage's own configuration, the seed and the keys of its upstream stages, so editing one
+# setting rebuilds the stage that reads it and everything downstream, and nothing else.
+CACHE_DIR = '.jnj_cache'
+CACHE_VERSION = 3 # Bump when a stage's code changes in a way its configuration does not show
+KEY_LENGTH = 16 # Hex digits of the sha256 kept in file names
+
+
+# --- Stage Builders ---
+# Each builder gets the stage seeds from derive_stage_seeds(), the upstream tables by name
+# and the worker count, and returns the stage's table.
+def build_dim_date(stage_seeds, tables, num_workers):
+    return generator.generate_dim_date()
+
+def build_dim_owner(stage_seeds, tables, num_workers):
+    rng, _, fake = generator.make_random_sources(stage_seeds['dim_owner'])
+    return generator.generate_dim_owner(rng, fake)
+
+def build_dim_platform(stage_seeds, tables, num_workers):
+    return generator.generate_dim_platform()
+
+def build_dim_property(stage_seeds, tables, num_workers):
+    rng, py_random, fake = generator.make_random_sources(stage_seeds['dim_property'])
+    return generator.generate_dim_property(tables['dim_owner'], rng, py_random, fake)
+
+def build_dim_amenity(stage_seeds, tables, num_workers):
+    return generator.generate_dim_amenity()
+
+def build_property_amenity(stage_seeds, tables, num_workers):
+    return generator.generate_property_amenity(tables['dim_property'])
+
+def build_dim_tenant(stage_seeds, tables, num_workers):
+    rng, _, fake = generator.make_random_sources(stage_seeds['dim_tenant'])
+    return generator.generate_dim_tenant(rng, fake)
+
+def plan_fact_shards(stage_seeds, tables):
+    """The same shard tasks generate_dataset() runs, so the facts match the CLI output row for row."""
+    return generator.plan_shards(tables['dim_property'], tables['dim_platform'], tables['dim_tenant'], tables['dim_date'],
+                                 stage_seeds['facts'], stage_seeds['fact_reviews'], with_property_daily=False)
+
+def split_by_shard(shard_tasks, tables, bookings):
+    """Split fact_bookings back into each shard's bookings, in the order the shard generated them."""
+    property_position = pd.Index(tables['dim_property']['property_id']).get_indexer(bookings['property_id'])
+    shard = property_position // generator.SHARD_SIZE
+    order = np.argsort(shard, kind='stable')
+    bounds = np.searchsorted(shard[order], np.arange(len(shard_tasks) + 1))
+    return [bookings.iloc[order[bounds[i]:bounds[i + 1]]] for i in range(len(shard_tasks))]
+
+def build_fact_bookings(stage_seeds, tables, num_workers):
+    shard_tasks = plan_fact_shards(stage_seeds, tables)
+    shard_bookings = list(generator.iter_shard_results(shard_tasks, num_workers, generator.generate_shard_bookings))
+    booking_id_offset = 0
+    for bookings in shard_bookings:
+        bookings['booking_id'] += booking_id_offset
+        booking_id_offset += len(bookings)
+    return pd.concat(shard_bookings, ignore_index=True)
+
+def build_fact_reviews(stage_seeds, tables, num_workers):
+    shard_tasks = plan_fact_shards(stage_seeds, tables)
+    shard_reviews = []
+    review_id_offset = 0
+    for task, bookings in zip(shard_tasks, split_by_shard(shard_tasks, tables, tables['fact_bookings'])):
+        # The bookings already carry their global booking_id, so only review ids need shifting
+        reviews = generator.generate_shard_reviews(task, bookings)
+        reviews['review_id'] += review_id_offset
+        review_id_offset += len(reviews)
+        shard_reviews.append(reviews)
+    return pd.concat(shard_reviews, ignore_index=True)
+
+def build_fact_property_daily(stage_seeds, tables, num_workers):
+    shard_tasks = plan_fact_shards(stage_seeds, tables)
+    return pd.concat([generator.build_property_daily(task[3], bookings)
+                      for task, bookings in zip(shard_tasks, split_by_shard(shard_tasks, tables, tables['fact_bookings']))],
+                     ignore_index=True)
+
+
+# --- Stage Registry ---
+# upstream: stages whose tables the builder reads; config: jnj_script globals it depends on.
+# Stages are listed in dependency order.
+STAGES = {
+    'dim_date': {
+        'upstream': [], 'config': ['START_DATE', 'END_DATE'], 'build': build_dim_date,
+    },
+    'dim_owner': {
+        'upstream': [], 'config': ['OWNER_CATEGORIES_CONFIG', 'IDENTITY_POOL_SIZE'], 'build': build_dim_owner,
+    },
+    'dim_platform': {
+        'upstream': [], 'config': ['NUM_PLATFORMS'], 'build': build_dim_platform,
+    },
+    'dim_amenity': {
+        'upstream': [], 'config': ['AMENITY_GROUPS'], 'build': build_dim_amenity,
+    },
+    'dim_property': {
+        'upstream': ['dim_owner'],
+        'config': ['NUM_PROPERTIES', 'AVG_ADR', 'OWNER_CATEGORIES_CONFIG', 'PROPERTY_TYPES_CONFIG',
+                   'BASIC_AMENITIES', 'LUXURY_AMENITIES_GENERAL', 'LUXURY_AMENITIES_OUTDOOR_LARGE'],
+        'build': build_dim_property,
+    },
+    'property_amenity': {
+        'upstream': ['dim_property'], 'config': ['AMENITY_GROUPS'], 'build': build_property_amenity,
+    },
+    'dim_tenant': {
+        'upstream': [], 'config': ['NUM_TENANTS', 'IDENTITY_POOL_SIZE'], 'build': build_dim_tenant,
+    },
+    'fact_bookings': {
+        'upstream': ['dim_date', 'dim_platform', 'dim_property', 'dim_tenant'],
+        'config': ['PROPERTY_TYPES_CONFIG', 'PROPERTY_OCCUPANCY_SPREAD', 'PLATFORM_BIAS', 'AVG_ADR', 'AVG_BOOKING_DURATION_DAYS', 'BOOKING_PURPOSES',
+                   'TENANT_REPEAT_PROB', 'TENANT_REPEAT_PROB_BY_PURPOSE', 'RECENT_TENANT_WINDOW', 'MIN_BOOKINGS_BEFORE_REPEATS',
+                   'SAME_PROPERTY_REPEAT_SHARE', 'PROPERTY_GUEST_MEMORY', 'STAY_LOOKAROUND_NIGHTS', 'BOOKING_CHUNK_SIZE', 'SHARD_SIZE'],
+        'build': build_fact_bookings,
+    },
+    'fact_reviews': {
+        'upstream': ['dim_date', 'dim_platform', 'dim_property', 'dim_tenant', 'fact_bookings'],
+        'config': ['REVIEW_RATING_DISTRIBUTION', 'REVIEW_COMMENTS', 'REVIEW_SHARE_OF_COMPLETED', 'REVIEW_DELAY_DAYS', 'SHARD_SIZE'],
+        'build': build_fact_reviews,
+    },
+    'fact_property_daily': {
+        'upstream': ['dim_date', 'dim_platform', 'dim_property', 'dim_tenant', 'fact_bookings'],
+        'config': ['SHARD_SIZE'],
+        'build': build_fact_property_daily,
+    },
+}
+
+
+def resolve_seed(seed=None):
+    """The root seed's entropy; None draws fresh entropy, so unseeded runs skip the cache."""
+    return np.random.SeedSequence(seed).entropy
+
+def stage_key(name, entropy, upstream_keys):
+    """Content hash of everything a stage's output depends on."""
+    stage = STAGES[name]
+    payload = {
+        'stage': name,
+        'version': CACHE_VERSION,
+        'seed': entropy,
+        'config': {setting: getattr(generator, setting) for setting in stage['config']},
+        'upstream': {upstream: upstream_keys[upstream] for upstream in stage['upstream']},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:KEY_LENGTH]
+
+def cache_path(cache_dir, name, key):
+    return os.path.join(cache_dir, f'{name}-{key}.pkl')
+
+
+def load_stage(name, seed=None, cache_dir=CACHE_DIR, rebuild=False, num_workers=1, loaded=None):
+    """Return a stage's table, building it (and any upstream stage not cached) only if needed.
+
+    With cache_dir=None, or no seed, nothing is read from or written to disk, since an
+    unseeded run's keys never match again; rebuild=True ignores existing cache entries
+    and overwrites them. loaded maps stage names to
+    (table, key) pairs already in memory and is filled in as stages load, so one
+    dict shared across calls loads each stage at most once.
+    """
+    if name not in STAGES:
+        raise KeyError(f"Unknown stage '{name}'; expected one of {', '.join(STAGES)}")
+    loaded = {} if loaded is None else loaded
+    if name in loaded:
+        return loaded[name][0]
+    if seed is None:
+        cache_dir = None
+    entropy = resolve_seed(seed)
+
+    tables = {}
+    upstream_keys = {}
+    for upstream in STAGES[name]['upstream']:
+        tables[upstream] = load_stage(upstream, entropy, cache_dir, rebuild, num_workers, loaded)
+        upstream_keys[upstream] = loaded[upstream][1]
+    key = stage_key(name, entropy, upstream_keys)
+    path = cache_path(cache_dir, name, key) if cache_dir else None
+
+    started = time.perf_counter()
+    if path and not rebuild and os.path.exists(path):
+        table = pd.read_pickle(path)
+        source = 'cached'
+    else:
+        _, stage_seeds = generator.derive_stage_seeds(entropy)
+        table = STAGES[name]['build'](stage_seeds, tables, num_workers)
+        source = 'built'
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Written under a temporary name first, so an interrupted run never leaves a partial entry
+            table.to_pickle(f'{path}.tmp')
+            os.replace(f'{path}.tmp', path)
+    print(f"{name:<19} {len(table):>12,} rows {time.perf_counter() - started:>9.2f} s {source} ({key})")
+    loaded[name] = (table, key)
+    return table
+
+def build_warehouse(seed=None, cache_dir=CACHE_DIR, rebuild=False, num_workers=1, stages=None):
+    """Load every stage (or the given ones and their upstream stages) and return their tables by name."""
+    if seed is None:
+        cache_dir = None
+        print("No seed given; stages are built without the cache.")
+    entropy = resolve_seed(seed)
+    loaded = {}
+    for name in stages or STAGES:
+        load_stage(name, entropy, cache_dir, rebuild, num_workers, loaded)
+    return {name: table for name, (table, _) in loaded.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the JnJ warehouse tables in memory, reusing cached stages.")
+    parser.add_argument('--seed', type=int, default=generator.SEED, help="Seed for every random source; omit for a fresh run")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Folder holding the cached stage tables")
+    parser.add_argument('--stages', help=f"Comma-separated stages to build ({', '.join(STAGES)}); default all")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore cached entries and rebuild every stage")
+    parser.add_argument('--workers', type=int, default=generator.NUM_WORKERS, help="Processes used to generate booking shards")
+    args = parser.parse_args()
+
+    build_warehouse(args.seed, args.cache_dir, args.rebuild, args.workers, args.stages.split(',') if args.stages else None)
+
+
+if __name__ == '__main__':
+    main()
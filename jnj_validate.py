@@ -0,0 +1,266 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from jnj_load import FOREIGN_KEYS, LOAD_ORDER, OPTIONAL_TABLES, PRIMARY_KEYS, UNIQUE_INDEXES
+from jnj_output import OUTPUT_FORMATS, TABLE_SCHEMAS, iter_table_chunks, table_path
+
+# --- Validation Configuration ---
+# Checks a generated warehouse against the constraints in JnJ SQL.sql before it is loaded:
+# primary and unique keys, NOT NULL columns, foreign keys, and the date and booking rules
+# the generator is meant to keep. Tables are streamed in LOAD_ORDER, so every parent key
+# is known before its children are read. Keys are tracked in boolean arrays indexed by id,
+# so each check is a vectorized lookup over a whole chunk.
+INPUT_DIR = 'synthetic_booking_data_v2'
+REPORT_PATH = 'validation_report.json'
+CHUNK_ROWS = 1_000_000
+SAMPLE_ROWS = 5 # Offending rows kept per check
+
+# Columns declared NULL in JnJ SQL.sql; every other column must be filled
+NULLABLE_COLUMNS = {
+    'dim_owner': {'owner_email', 'owner_phone'},
+    'dim_tenant': {'tenant_email', 'tenant_phone'},
+    'dim_property': {'distance_to_city_center', 'amenities'},
+    'fact_bookings': {'purpose_of_stay', 'damage_cost'},
+    'fact_reviews': {'booking_id', 'review_text'},
+    'fact_property_daily': {'booking_id'},
+}
+
+# Columns kept per key, so child tables can check their rows against the parent row
+INDEXED_COLUMNS = {
+    'dim_date': ['date'],
+    'dim_property': ['amenity_mask'],
+    'fact_bookings': ['property_id', 'tenant_id', 'check_in_date_id', 'check_out_date_id'],
+}
+
+
+class KeyIndex:
+    """The non-negative integer keys seen so far, and some of their rows' columns, indexed by key."""
+
+    def __init__(self, columns=()):
+        self.present = np.zeros(0, dtype=bool)
+        self.values = {column: None for column in columns}
+
+    def _grow(self, size):
+        if size <= len(self.present):
+            return
+        size = max(size, 2 * len(self.present))
+        self.present = np.concatenate([self.present, np.zeros(size - len(self.present), dtype=bool)])
+        for column, values in self.values.items():
+            if values is not None:
+                self.values[column] = np.concatenate([values, np.zeros(size - len(values), dtype=values.dtype)])
+
+    def add(self, keys, chunk=None):
+        """Record a chunk's keys (-1 for none) and return which of them were already seen."""
+        valid = keys >= 0
+        self._grow(int(keys.max(initial=-1)) + 1)
+        valid_keys = keys[valid]
+        order = np.argsort(valid_keys, kind='stable')
+        repeated_in_chunk = np.zeros(len(valid_keys), dtype=bool)
+        repeated_in_chunk[order[1:]] = valid_keys[order[1:]] == valid_keys[order[:-1]]
+        duplicate = np.zeros(len(keys), dtype=bool)
+        duplicate[valid] = repeated_in_chunk | self.present[valid_keys]
+        self.present[valid_keys] = True
+        for column in self.values:
+            values = chunk[column].to_numpy()
+            if self.values[column] is None:
+                # Integer columns are kept as int32, like the ids in TABLE_SCHEMAS
+                self.values[column] = np.zeros(len(self.present), dtype=np.int32 if values.dtype.kind in 'iu' else values.dtype)
+                if values.dtype == object:
+                    self.values[column][:] = None
+            self.values[column][valid_keys] = values[valid]
+        return duplicate
+
+    def contains(self, keys):
+        found = np.zeros(len(keys), dtype=bool)
+        in_range = (keys >= 0) & (keys < len(self.present))
+        found[in_range] = self.present[keys[in_range]]
+        return found
+
+    def lookup(self, column, keys, found):
+        """column's value for every found key; rows that were not found get the column's zero value."""
+        values = np.zeros(len(keys), dtype=self.values[column].dtype)
+        values[found] = self.values[column][keys[found]]
+        return values
+
+
+def key_values(chunk, column):
+    """An integer column as int64, with nulls as -1."""
+    return chunk[column].fillna(-1).to_numpy().astype(np.int64)
+
+
+# --- Row Rules ---
+# Each rule takes a chunk and the keys of the tables already read, and returns a mask of the
+# rows that break it. Rows whose parent is missing are left to the foreign-key checks.
+def date_matches(chunk, keys, date_column, date_id_column):
+    date_id = key_values(chunk, date_id_column)
+    found = keys['dim_date'].contains(date_id)
+    dates = chunk[date_column].to_numpy(dtype=object)
+    return found & (dates != keys['dim_date'].lookup('date', date_id, found))
+
+def booking_columns(chunk, keys, *columns):
+    booking_id = key_values(chunk, 'booking_id')
+    found = keys['fact_bookings'].contains(booking_id)
+    return found, [keys['fact_bookings'].lookup(column, booking_id, found) for column in columns]
+
+def review_after_check_out(chunk, keys):
+    found, (check_out_date_id,) = booking_columns(chunk, keys, 'check_out_date_id')
+    return found & (chunk['review_date_id'].to_numpy() <= check_out_date_id)
+
+def review_matches_booking(chunk, keys):
+    found, (property_id, tenant_id) = booking_columns(chunk, keys, 'property_id', 'tenant_id')
+    return found & ((chunk['property_id'].to_numpy() != property_id) | (chunk['tenant_id'].to_numpy() != tenant_id))
+
+def night_within_booking(chunk, keys):
+    found, (property_id, check_in_date_id, check_out_date_id) = booking_columns(
+        chunk, keys, 'property_id', 'check_in_date_id', 'check_out_date_id')
+    date_id = chunk['date_id'].to_numpy()
+    return found & ((chunk['property_id'].to_numpy() != property_id) | (date_id < check_in_date_id) | (date_id >= check_out_date_id))
+
+def amenity_in_mask(chunk, keys):
+    property_id = key_values(chunk, 'property_id')
+    found = keys['dim_property'].contains(property_id)
+    mask = keys['dim_property'].lookup('amenity_mask', property_id, found).astype(np.int64)
+    return found & (((mask >> (chunk['amenity_id'].to_numpy() - 1)) & 1) == 0)
+
+ROW_RULES = {
+    'fact_bookings': {
+        'nights_match_dates': lambda chunk, keys: chunk['nights'].to_numpy() != chunk['check_out_date_id'].to_numpy() - chunk['check_in_date_id'].to_numpy(),
+        'positive_nights': lambda chunk, keys: chunk['nights'].to_numpy() < 1,
+        'check_in_matches_date_id': lambda chunk, keys: date_matches(chunk, keys, 'check_in', 'check_in_date_id'),
+        'check_out_matches_date_id': lambda chunk, keys: date_matches(chunk, keys, 'check_out', 'check_out_date_id'),
+        'binary_flags': lambda chunk, keys: ~chunk['damage_flag'].isin([0, 1]).to_numpy() | ~chunk['turnover_flag'].isin([0, 1]).to_numpy(),
+        'non_negative_amounts': lambda chunk, keys: (chunk['revenue'].to_numpy() < 0) | (chunk['damage_cost'].fillna(0).to_numpy() < 0),
+    },
+    'fact_reviews': {
+        'review_after_check_out': review_after_check_out,
+        'review_matches_booking': review_matches_booking,
+        'review_date_matches_date_id': lambda chunk, keys: date_matches(chunk, keys, 'review_date', 'review_date_id'),
+        'rating_in_range': lambda chunk, keys: ~chunk['rating'].between(1, 5).to_numpy(),
+    },
+    'fact_property_daily': {
+        'date_matches_date_id': lambda chunk, keys: date_matches(chunk, keys, 'date', 'date_id'),
+        'occupied_has_booking': lambda chunk, keys: (chunk['occupied'].to_numpy() == 1) == chunk['booking_id'].isna().to_numpy(),
+        'night_within_booking': night_within_booking,
+    },
+    'property_amenity': {
+        'amenity_in_mask': amenity_in_mask,
+    },
+}
+
+
+class ViolationReport:
+    """Violation counts and the first SAMPLE_ROWS offending rows per check."""
+
+    def __init__(self, sample_rows=SAMPLE_ROWS):
+        self.sample_rows = sample_rows
+        self.checks = {}
+
+    def add(self, table_name, check_name, rows, bad):
+        check = self.checks.setdefault(f'{table_name}.{check_name}', {'table': table_name, 'violations': 0, 'samples': []})
+        count = int(bad.sum())
+        if not count:
+            return
+        check['violations'] += count
+        wanted = self.sample_rows - len(check['samples'])
+        if wanted > 0:
+            samples = rows[bad][:wanted]
+            samples = json.loads(samples.to_json(orient='records')) if isinstance(samples, pd.DataFrame) else [{'value': value} for value in samples]
+            check['samples'].extend(samples)
+
+    @property
+    def violations(self):
+        return sum(check['violations'] for check in self.checks.values())
+
+
+def composite_keys(chunk, table_name, columns, keys):
+    """Fold a two-column key into one integer, using the second column's parent key range as the stride."""
+    first, second = columns
+    parent_table = next(parent for _, table, column, parent, _ in FOREIGN_KEYS if table == table_name and column == second)
+    stride = len(keys[parent_table].present)
+    first_values, second_values = key_values(chunk, first), key_values(chunk, second)
+    valid = (first_values >= 0) & (second_values >= 0) & (second_values < stride)
+    return np.where(valid, first_values * stride + second_values, -1)
+
+def validate_table(input_dir, table_name, input_format, keys, report, chunk_rows=CHUNK_ROWS):
+    """Stream one table through every check; fills keys[table_name] for the tables read after it."""
+    primary_key = [column.strip() for column in PRIMARY_KEYS[table_name].split(',')]
+    not_null = [column for column in TABLE_SCHEMAS[table_name] if column not in NULLABLE_COLUMNS.get(table_name, set())]
+    foreign_keys = [(name, column, parent) for name, table, column, parent, _ in FOREIGN_KEYS if table == table_name]
+    unique_columns = {column: [] for table, _, column in UNIQUE_INDEXES if table == table_name}
+    key_index = KeyIndex(INDEXED_COLUMNS.get(table_name, ()))
+    rows = 0
+
+    for chunk in iter_table_chunks(input_dir, table_name, input_format, chunk_rows):
+        rows += len(chunk)
+        nulls = chunk[not_null].isna().to_numpy()
+        report.add(table_name, 'not_null', chunk, nulls.any(axis=1))
+        key = key_values(chunk, primary_key[0]) if len(primary_key) == 1 else composite_keys(chunk, table_name, primary_key, keys)
+        report.add(table_name, 'primary_key', chunk, key_index.add(key, chunk))
+        for constraint_name, column, parent in foreign_keys:
+            values = key_values(chunk, column)
+            report.add(table_name, constraint_name, chunk, (values >= 0) & ~keys[parent].contains(values))
+        for rule_name, rule in ROW_RULES.get(table_name, {}).items():
+            report.add(table_name, rule_name, chunk, rule(chunk, keys))
+        for column, values in unique_columns.items():
+            values.append(chunk[column])
+
+    for column, values in unique_columns.items():
+        # Only dimension tables carry unique indexes, so their columns fit in memory whole
+        column_values = pd.concat(values, ignore_index=True) if values else pd.Series(dtype=object)
+        report.add(table_name, f'unique_{column}', column_values.to_numpy(dtype=object),
+                   (column_values.duplicated() & column_values.notna()).to_numpy())
+    keys[table_name] = key_index
+    return rows
+
+def validate_warehouse(input_dir=INPUT_DIR, input_format='csv', chunk_rows=CHUNK_ROWS, sample_rows=SAMPLE_ROWS):
+    """Check every generated table; returns the report as a JSON-ready dict."""
+    keys = {}
+    report = ViolationReport(sample_rows)
+    tables = []
+    for table_name in LOAD_ORDER:
+        if not os.path.exists(table_path(input_dir, table_name, input_format)):
+            if table_name not in OPTIONAL_TABLES:
+                raise FileNotFoundError(f"{table_name} not found in '{input_dir}'; run jnj_script.py --format {input_format} first")
+            continue
+        started = time.perf_counter()
+        rows = validate_table(input_dir, table_name, input_format, keys, report, chunk_rows)
+        seconds = time.perf_counter() - started
+        tables.append({'table': table_name, 'rows': rows, 'seconds': round(seconds, 3)})
+        failed = {name: check['violations'] for name, check in report.checks.items() if check['table'] == table_name and check['violations']}
+        print(f"{table_name:<19} {rows:>12,} rows {seconds:>9.2f} s {'ok' if not failed else failed}")
+    return {
+        'input_dir': input_dir,
+        'format': input_format,
+        'violations': report.violations,
+        'tables': tables,
+        'checks': [{'check': name, **check} for name, check in report.checks.items()],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check a generated JnJ warehouse against the keys and rules in JnJ SQL.sql.")
+    parser.add_argument('--input-dir', default=INPUT_DIR, help="Folder written by jnj_script.py")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv', help="Format the tables were generated in")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Rows read per chunk")
+    parser.add_argument('--samples', type=int, default=SAMPLE_ROWS, help="Offending rows kept per check")
+    parser.add_argument('--report', default=REPORT_PATH, help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    print(f"Validating '{args.input_dir}' ({args.format})...")
+    started = time.perf_counter()
+    report = validate_warehouse(args.input_dir, args.format, args.chunk_rows, args.samples)
+    with open(args.report, 'w') as report_file:
+        json.dump(report, report_file, indent=2, default=str)
+    print(f"{report['violations']:,} violation(s) in {time.perf_counter() - started:.2f} s; report written to '{args.report}'.")
+    if report['violations']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()